@@ -0,0 +1,84 @@
+"""
+Recall@k and queries/sec of the IVF index against an exact scan, on synthetic embeddings.
+
+Vectors are drawn around random cluster centres (real review embeddings are clustered too),
+unit-normalized, saved to .npy and memory-mapped, the same layout LocalVectorStore uses. The IVF
+index is built, saved and reloaded with mmap before it is queried.
+
+Usage: python benchmarks/ann_benchmark.py [--rows 200000] [--dim 256] [--queries 200] [--k 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from prod_assistant.retriever.ann_index import IVFIndex
+
+NPROBES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _normalize(matrix):
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+
+def synthetic(rows, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = _normalize(rng.standard_normal((clusters, dim)).astype(np.float32))
+    labels = rng.integers(0, clusters, rows)
+    vectors = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, 65536):
+        end = min(start + 65536, rows)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32) * 0.1
+        vectors[start:end] = _normalize(centres[labels[start:end]] + noise)
+    return vectors
+
+
+def exact_top_k(matrix, query, k):
+    scores = matrix @ query
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def main(rows, dim, n_queries, k, n_lists):
+    workdir = tempfile.mkdtemp()
+    np.save(os.path.join(workdir, "vectors.npy"), synthetic(rows, dim, clusters=max(16, rows // 200)))
+    matrix = np.load(os.path.join(workdir, "vectors.npy"), mmap_mode="r")
+    rng = np.random.default_rng(1)
+    queries = _normalize(np.asarray(matrix[rng.choice(rows, n_queries, replace=False)])
+                         + rng.standard_normal((n_queries, dim)).astype(np.float32) * 0.07)
+
+    start = time.perf_counter()
+    IVFIndex.build(matrix, n_lists).save(workdir)
+    build_seconds = time.perf_counter() - start
+    index = IVFIndex.load(workdir)
+    print(f"rows={rows} dim={dim} lists={len(index.centroids)} build={build_seconds:.1f}s")
+
+    start = time.perf_counter()
+    truth = [set(exact_top_k(matrix, q, k).tolist()) for q in queries]
+    exact_qps = n_queries / (time.perf_counter() - start)
+
+    print(f"\n{'search':<14} {'recall@' + str(k):>9} {'qps':>9} {'speedup':>8}")
+    print(f"{'exact':<14} {1.0:>9.3f} {exact_qps:>9.1f} {1.0:>8.1f}")
+    for nprobe in NPROBES:
+        if nprobe > len(index.centroids):
+            break
+        start = time.perf_counter()
+        hits = 0
+        for query, expected in zip(queries, truth):
+            rows_found, _ = index.search(query, k, lambda r, q=query: matrix[r] @ q, nprobe)
+            hits += len(expected & set(rows_found.tolist()))
+        qps = n_queries / (time.perf_counter() - start)
+        print(f"{'ivf nprobe=' + str(nprobe):<14} {hits / (k * n_queries):>9.3f} {qps:>9.1f} {qps / exact_qps:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default sqrt(rows))")
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.queries, args.k, args.lists)
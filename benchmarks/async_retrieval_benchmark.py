@@ -0,0 +1,96 @@
+"""
+Throughput of N concurrent get_product_info MCP tool calls.
+
+Runs the tool against an in-memory vector store built from data/product_reviews.csv whose
+embedding and search calls sleep for a fixed latency, standing in for the AstraDB and
+embedding-API round trips. Compares the old behaviour (sync retriever.invoke inside the async
+tool, which blocks the event loop) with the native async path (Retriever.acall_retriever).
+The in-memory adapter runs its searches on asyncio's default executor, so async throughput
+here is capped by that pool's size; the AstraDB adapter is natively async.
+
+Usage: python benchmarks/async_retrieval_benchmark.py [--calls 32] [--latency-ms 50]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from prod_assistant.mcp_servers import product_search_server
+from prod_assistant.retriever.retrieval import Retriever
+
+QUERIES = [
+    "What is the price of iPhone 16?",
+    "Is the Samsung Galaxy camera good?",
+    "Which phone has the best battery life?",
+    "Tell me about low budget phones",
+]
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    latency: float = 0.05
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+class SlowVectorStore(InMemoryVectorStore):
+    latency: float = 0.05
+
+    def _similarity_search_with_score_by_vector(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super()._similarity_search_with_score_by_vector(*args, **kwargs)
+
+
+def _load_documents():
+    df = pd.read_csv(os.path.join(os.getcwd(), "data", "product_reviews.csv"))
+    documents = []
+    for _, row in df.iterrows():
+        metadata = {key: row[key] for key in ("product_id", "product_title", "rating", "total_reviews", "price")}
+        content = ",".join(f"{key}:{value}" for key, value in row.items())
+        documents.append(Document(page_content=content, metadata=metadata))
+    return documents
+
+
+async def _blocking_get_product_info(query: str) -> str:
+    """get_product_info as it was before the async path: sync invoke inside the coroutine."""
+    async with product_search_server.astra_db_limiter:
+        docs = product_search_server.retriever_obj.load_retriever().invoke(query)
+    return product_search_server.format_docs(docs)
+
+
+async def bench(name, tool, calls):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(tool(QUERIES[i % len(QUERIES)]) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    assert all(result.strip() for result in results)
+    print(f"{name:<34} {calls:>6} {elapsed:>9.3f} {calls / elapsed:>11.1f}")
+
+
+async def main(calls, latency):
+    store = SlowVectorStore(embedding=SlowEmbeddings(size=64, latency=latency))
+    store.latency = latency
+    store.add_documents(_load_documents())
+    product_search_server.retriever_obj = Retriever(vstore=store)
+
+    print(f"{'mode':<34} {'calls':>6} {'seconds':>9} {'calls/sec':>11}")
+    for n in sorted({1, calls // 4 or 1, calls}):
+        await bench("blocking (retriever.invoke)", _blocking_get_product_info, n)
+        await bench("async (acall_retriever)", product_search_server.get_product_info, n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.latency_ms / 1000))
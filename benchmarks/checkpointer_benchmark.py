@@ -0,0 +1,99 @@
+"""
+Checkpoint read/write latency as a conversation thread grows.
+
+Compares the stock MemorySaver with the bounded in-memory and SQLite checkpointers from
+prod_assistant.workflow.checkpointer. Each turn appends a user message plus two ~1 KB
+assistant messages (roughly what assistant -> tools -> generate adds).
+
+Usage: python benchmarks/checkpointer_benchmark.py [--turns 200] [--reads 50]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Annotated, Sequence, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from prod_assistant.workflow.checkpointer import create_checkpointer
+
+REPORT_AT = (1, 5, 10, 25, 50, 100, 200, 400)
+
+
+class State(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+
+
+async def _tool_output(state):
+    return {"messages": [AIMessage(content="Title: Apple iPhone 16 | Price: 79999 | Rating: 4.6 " * 20)]}
+
+
+async def _answer(state):
+    return {"messages": [AIMessage(content="The Apple iPhone 16 costs 79,999 and is rated 4.6. " * 20)]}
+
+
+def _build_graph(checkpointer):
+    graph = StateGraph(State)
+    graph.add_node("tools", _tool_output)
+    graph.add_node("generate", _answer)
+    graph.add_edge(START, "tools")
+    graph.add_edge("tools", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+async def bench(name, checkpointer, turns, reads):
+    put_times = []
+    original_aput = checkpointer.aput
+
+    async def timed_aput(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original_aput(*args, **kwargs)
+        finally:
+            put_times.append(time.perf_counter() - start)
+
+    checkpointer.aput = timed_aput
+    app = _build_graph(checkpointer)
+    config = {"configurable": {"thread_id": "bench-thread"}}
+
+    print(f"\n{name}")
+    print(f"{'turns':>6} {'messages':>9} {'write ms':>9} {'read ms':>8}")
+    for turn in range(1, turns + 1):
+        put_times.clear()
+        await app.ainvoke({"messages": [HumanMessage(content=f"question {turn} about phones")]}, config)
+        if turn in REPORT_AT:
+            write_ms = 1000 * sum(put_times) / len(put_times)
+            start = time.perf_counter()
+            for _ in range(reads):
+                checkpoint = await checkpointer.aget_tuple(config)
+            read_ms = 1000 * (time.perf_counter() - start) / reads
+            messages = len(checkpoint.checkpoint["channel_values"]["messages"])
+            print(f"{turn:>6} {messages:>9} {write_ms:>9.3f} {read_ms:>8.3f}")
+
+    if hasattr(checkpointer, "aclose"):
+        await checkpointer.aclose()
+
+
+async def main(turns, reads):
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+    settings = {"ttl_seconds": 3600, "max_threads": 5000, "max_checkpoints_per_thread": 20,
+                "max_memory_mb": 256, "sqlite_path": sqlite_path}
+
+    await bench("MemorySaver (unbounded history)", MemorySaver(), turns, reads)
+    await bench("BoundedMemorySaver", await create_checkpointer({"checkpointer": {**settings, "backend": "memory"}}),
+                turns, reads)
+    await bench("BoundedSqliteSaver", await create_checkpointer({"checkpointer": {**settings, "backend": "sqlite"}}),
+                turns, reads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.reads))
@@ -0,0 +1,102 @@
+"""
+Time of DataIngestion.run_pipeline's store step on a first load, on an unchanged re-run, and on
+a re-run after a small catalog update, with the local vector store backend.
+
+A synthetic catalog is written by repeating the rows of data/product_reviews.csv with fresh
+product ids. Embedding calls sleep for a fixed latency per batch, standing in for the embedding
+API. The update changes the price of --changed of the products and drops --removed of them;
+only those are re-embedded (or deleted), and the collection ends with one row per product.
+Finally the catalog is embedded once into an embedding artifact and loaded from it into a
+fresh collection, which makes no embedding calls.
+
+Usage: python benchmarks/incremental_ingestion_benchmark.py [--rows 2000] [--latency-ms 200] [--changed 0.05] [--removed 0.02]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from prod_assistant.etl.data_ingestion import DataIngestion
+from prod_assistant.retriever.local_vector_store import LocalVectorStore
+from prod_assistant.utils.config_loader import load_config
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    latency: float = 0.2
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+
+class _Models:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def load_embeddings(self):
+        return self.embeddings
+
+
+def ingestion(path, workdir, embeddings):
+    config = load_config()
+    config["vector_store"] = {"backend": "local", "local": {"path": os.path.join(workdir, "vector_store")}}
+    config["retriever"] = dict(config.get("retriever", {}), index_dir=workdir)
+    config["semantic_cache"] = dict(config.get("semantic_cache", {}), version_dir=workdir)
+    run = DataIngestion.__new__(DataIngestion)
+    run.config, run.model_loader, run.csv_path = config, _Models(embeddings), path
+    run.chunk_size = config.get("ingestion", {}).get("csv_chunk_size", 10000)
+    run.db_api_endpoint = run.db_application_token = run.db_keyspace = None
+    return run
+
+
+def measure(name, run, embeddings, store=None):
+    calls = embeddings.calls
+    start = time.perf_counter()
+    vstore, inserted = (store or (lambda: run.store_batches(run.iter_document_batches())))()
+    seconds = time.perf_counter() - start
+    rows = len(vstore._row_by_id) if isinstance(vstore, LocalVectorStore) else "?"
+    print(f">> {name:<20} {seconds:>8.2f}s  inserted={len(inserted):<6} embed_calls={embeddings.calls - calls:<4} "
+          f"collection_rows={rows}\n")
+
+
+def main(rows, latency, changed, removed):
+    workdir = tempfile.mkdtemp()
+    seed = pd.read_csv("data/product_reviews.csv", dtype=str, keep_default_na=False)
+    df = pd.concat([seed] * (rows // len(seed) + 1), ignore_index=True).iloc[:rows]
+    df["product_id"] = [f"itm{i:013d}" for i in range(rows)]
+    path = os.path.join(workdir, "catalog.csv")
+    df.to_csv(path, index=False)
+
+    embeddings = SlowEmbeddings(size=768, latency=latency)
+    run = ingestion(path, workdir, embeddings)
+    measure("first load", run, embeddings)
+    measure("unchanged re-run", run, embeddings)
+
+    edited = df.sample(frac=changed, random_state=0).index
+    df.loc[edited, "price"] = "₹1"
+    df = df.drop(df.drop(edited).sample(frac=removed, random_state=1).index)
+    df.to_csv(path, index=False)
+    measure(f"{len(edited)} changed, {rows - len(df)} removed", run, embeddings)
+
+    run.config["ingestion"]["artifact"] = {"path": os.path.join(workdir, "artifact")}
+    calls, start = embeddings.calls, time.perf_counter()
+    artifact = run.embed_artifact()
+    print(f">> {'embed artifact':<20} {time.perf_counter() - start:>8.2f}s  documents={len(artifact):<5} "
+          f"embed_calls={embeddings.calls - calls}\n")
+    run.config["astra_db"]["collection_name"] = "artifact_reload"
+    measure("load into new coll.", run, embeddings, store=lambda: run.load_artifact(artifact))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--changed", type=float, default=0.05)
+    parser.add_argument("--removed", type=float, default=0.02)
+    args = parser.parse_args()
+    main(args.rows, args.latency_ms / 1000, args.changed, args.removed)
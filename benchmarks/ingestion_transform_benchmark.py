@@ -0,0 +1,83 @@
+"""
+Throughput and peak memory of the CSV-to-Document transform: the row-wise iterrows() loop that
+DataIngestion used to run over a fully loaded DataFrame, against the chunked column-wise
+iter_document_batches stream.
+
+A synthetic catalog export is written to a temporary CSV by repeating the rows of
+data/product_reviews.csv with fresh product ids. Batches from the stream are consumed and
+dropped, the way store_batches hands them to the vector store, so its peak memory is bounded
+by the chunk size. Peak memory is measured with tracemalloc in a separate pass.
+
+Usage: python benchmarks/ingestion_transform_benchmark.py [--rows 200000] [--chunk-size 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from langchain_core.documents import Document
+
+from prod_assistant.etl.data_ingestion import DataIngestion
+from prod_assistant.retriever.constraints import to_number
+
+
+def synthetic_csv(rows, source="data/product_reviews.csv"):
+    seed = pd.read_csv(source)
+    df = pd.concat([seed] * (rows // len(seed) + 1), ignore_index=True).iloc[:rows]
+    df["product_id"] = [f"itm{i:013d}" for i in range(rows)]
+    path = os.path.join(tempfile.mkdtemp(), "catalog.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def rowwise(path):
+    """The previous transform: eager read_csv, iterrows() into dicts, then a second loop into Documents."""
+    product_data = pd.read_csv(path)
+    product_list = [{column: row[column] for column in
+                     ("product_id", "product_title", "rating", "total_reviews", "price", "top_reviews")}
+                    for _, row in product_data.iterrows()]
+    documents = []
+    for entry in product_list:
+        metadata = {k: entry[k] for k in ("product_id", "product_title", "rating", "total_reviews", "price")}
+        metadata.update(price_value=to_number(entry["price"]), rating_value=to_number(entry["rating"]),
+                        total_reviews_value=to_number(entry["total_reviews"]))
+        documents.append(Document(page_content=",".join(f"{k}:{v}" for k, v in entry.items()), metadata=metadata))
+    return len(documents)
+
+
+def streaming(path, chunk_size):
+    ingestion = DataIngestion.__new__(DataIngestion)
+    ingestion.csv_path = path
+    ingestion.chunk_size = chunk_size
+    ingestion._validate_csv()
+    return sum(len(batch) for batch in ingestion.iter_document_batches())
+
+
+def measure(name, fn, rows):
+    start = time.perf_counter()
+    count = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<24} {count:>9} {count / seconds:>12.0f} {peak / 2**20:>12.1f}")
+    assert count == rows
+
+
+def main(rows, chunk_size):
+    path = synthetic_csv(rows)
+    print(f"rows={rows} csv={os.path.getsize(path) / 2**20:.1f} MiB chunk_size={chunk_size}\n")
+    print(f"{'transform':<24} {'documents':>9} {'docs/sec':>12} {'peak MiB':>12}")
+    measure("iterrows (eager)", lambda: rowwise(path), rows)
+    measure("chunked column-wise", lambda: streaming(path, chunk_size), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.rows, args.chunk_size)
@@ -0,0 +1,102 @@
+"""
+Offline scrape run against saved-style Flipkart pages served from a local HTTP server.
+
+Search and product pages are generated with the selectors FlipkartScraper parses (product cards,
+title/price/rating/review-count, review blocks), served on 127.0.0.1, and scraped over the HTTP
+fast path: once sequentially with one FlipkartScraper, once with ParallelScraper workers.
+Prints rows, elapsed time and which path served each page. No browser is started unless a page
+lacks the needed fields.
+
+Usage: python benchmarks/scraper_benchmark.py [--queries 4] [--products 3] [--reviews 2] [--workers 3] [--latency 0.2]
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from prod_assistant.etl.data_scrapper import FlipkartScraper
+from prod_assistant.etl.scrape_orchestrator import ParallelScraper
+from prod_assistant.utils.metrics import METRICS
+
+
+def search_page(query, products):
+    cards = "".join(
+        f'<div data-id="{query}{i}"><a href="/{query}-phone-{i}/p/itm{query}{i:04d}">'
+        f'<div class="KzDlHZ">{query.title()} Phone {i} (Black, 128 GB)</div></a>'
+        f'<div class="XQDdHH">4.{i % 10}</div><span class="Wphh3N">1,2{i:02d} Ratings &amp; {i + 10} Reviews</span>'
+        f'<div class="Nx9bqj">₹{20 + i},999</div></div>'
+        for i in range(products))
+    return f"<html><body><div id='container'>{cards}</div></body></html>"
+
+
+def product_page(product_id, reviews):
+    blocks = "".join(f'<div class="col EPCmJX">5 Review {r} of {product_id} READ MORE Buyer Certified Buyer</div>'
+                     for r in range(reviews))
+    return f"<html><body><h1>{product_id}</h1>{blocks}</body></html>"
+
+
+def serve(products, reviews, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)  # server render time
+            url = urlparse(self.path)
+            if url.path == "/search":
+                body = search_page(parse_qs(url.query)["q"][0].replace(" ", ""), products)
+            elif "/p/" in url.path:
+                body = product_page(url.path.rsplit("/", 1)[-1], reviews)
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def pages_served():
+    """Page counters since the previous call (worker processes' counters are merged by ParallelScraper)."""
+    counters = METRICS.drain()["counters"]
+    return ", ".join(f"{k.split('scraper.')[1]}={int(v)}" for k, v in sorted(counters.items()) if "_pages." in k)
+
+
+def main(n_queries, products, reviews, workers, latency):
+    server, base_url = serve(products, reviews + 2, latency)
+    queries = [f"brand{q}" for q in range(n_queries)]
+    try:
+        start = time.perf_counter()
+        with FlipkartScraper(base_url=base_url, output_dir="/tmp") as scraper:
+            rows = [row for query in queries for row in scraper.scrape_flipkart_products(query, products, reviews)]
+        sequential = time.perf_counter() - start
+        print(f"\nsequential: {len(rows)} products in {sequential:.2f}s; pages served {pages_served()}")
+
+        start = time.perf_counter()
+        parallel_rows = ParallelScraper(workers=workers, min_interval_seconds=0, base_url=base_url).scrape(
+            queries, max_products=products, review_count=reviews)
+        parallel = time.perf_counter() - start
+        print(f"parallel ({workers} workers, incl. process start): {len(parallel_rows)} products in {parallel:.2f}s; "
+              f"pages served {pages_served()}")
+        print(f"rows identical: {rows == parallel_rows}")
+        print(f"sample row: {rows[0]}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=4)
+    parser.add_argument("--products", type=int, default=3)
+    parser.add_argument("--reviews", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated server time per page (s)")
+    args = parser.parse_args()
+    main(args.queries, args.products, args.reviews, args.workers, args.latency)
@@ -1,16 +1,35 @@
 import os
+import argparse
+import threading
 import pandas as pd
 from dotenv import load_dotenv
-from typing import List
+from typing import Iterable, Iterator, List
 from langchain_core.documents import Document
-from langchain_astradb import AstraDBVectorStore
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.embedding_cache import CachedEmbeddings
+from prod_assistant.utils.semantic_cache import bump_collection_version
+from prod_assistant.retriever.lexical_index import documents_path, save_documents
+from prod_assistant.retriever.adjacency import AdjacencyWriter
+from prod_assistant.retriever.vector_store import compact_store, create_vector_store
+from prod_assistant.etl.ingest_pipeline import IngestPipeline, PrecomputedEmbeddings
+from prod_assistant.etl.ingest_manifest import IngestManifest, content_hash, document_id, manifest_path
+from prod_assistant.etl.embedding_artifact import ArtifactEmbeddings, ArtifactWriter, EmbeddingArtifact
+
+CSV_COLUMNS = ["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"]
+# Numeric copies for range filters ("under 30000", "rated above 4.5")
+NUMERIC_COLUMNS = {"price_value": "price", "rating_value": "rating", "total_reviews_value": "total_reviews"}
+
+
+def _numeric_column(values: pd.Series) -> pd.Series:
+    """Column-wise constraints.to_number: "₹1,34,999" -> 134999.0, unparsable -> None."""
+    numbers = pd.to_numeric(values.str.replace(r"[^\d.]", "", regex=True), errors="coerce").astype(float)
+    return numbers.astype(object).where(numbers.notna(), None)
 
 
 class DataIngestion:
     """
-    Class to handle data ingestion into AstraDB vector database.
+    Class to handle data ingestion into the configured vector store (AstraDB or local).
     """
 
     def __init__(self):
@@ -19,10 +38,11 @@ class DataIngestion:
         """
         print("Initializing DataIngestion pipeline...")
         self.model_loader=ModelLoader()
+        self.config=load_config()
         self._load_env_variables()
         self.csv_path = self._get_csv_path()
-        self.product_data = self._load_csv()
-        self.config=load_config()
+        self.chunk_size = self.config.get("ingestion", {}).get("csv_chunk_size", 10000)
+        self._validate_csv()
 
     def _load_env_variables(self):
         """
@@ -30,6 +50,8 @@ class DataIngestion:
         """
         load_dotenv()
         required_vars = ["GOOGLE_API_KEY", "ASTRA_DB_API_ENDPOINT", "ASTRA_DB_APPLICATION_TOKEN", "ASTRA_DB_KEYSPACE"]
+        if self.config.get("vector_store", {}).get("backend", "astra") == "local":
+            required_vars = ["GOOGLE_API_KEY"]
         
         missing_vars = [var for var in required_vars if os.getenv(var) is None]
         if missing_vars:
@@ -53,49 +75,46 @@ class DataIngestion:
         return csv_path
 
 
-    def _load_csv(self):
+    def _validate_csv(self):
+        """
+        Check the CSV header without loading the file.
+        """
+        columns = pd.read_csv(self.csv_path, nrows=0).columns
+
+        if not set(CSV_COLUMNS).issubset(set(columns)):
+            raise ValueError(f"CSV must contain columns: {set(CSV_COLUMNS)}")
+
+    def iter_document_batches(self, chunk_size: int = None) -> Iterator[List[Document]]:
         """
-        Load data from CSV file.
+        Stream the CSV in chunks of chunk_size rows, yielding one batch of Documents per chunk.
+        Fields are kept as the CSV text (dtype=str), so results do not depend on the chunk size.
         """
-        df = pd.read_csv(self.csv_path)
-        expected_columns = {'product_id','product_title', 'rating', 'total_reviews','price', 'top_reviews'}
+        chunks = pd.read_csv(self.csv_path, usecols=CSV_COLUMNS, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size or self.chunk_size)
+        for chunk in chunks:
+            yield self._chunk_to_documents(chunk)
 
-        if not expected_columns.issubset(set(df.columns)):
-            raise ValueError(f"CSV must contain columns: {expected_columns}")
+    @staticmethod
+    def _chunk_to_documents(chunk: pd.DataFrame) -> List[Document]:
+        # page_content is "product_id:...,product_title:...,...,top_reviews:...", built column-wise
+        page_content = chunk[CSV_COLUMNS[0]].radd(f"{CSV_COLUMNS[0]}:")
+        for column in CSV_COLUMNS[1:]:
+            page_content = page_content + f",{column}:" + chunk[column]
 
-        return df
+        metadata = chunk[CSV_COLUMNS[:-1]].copy()
+        for target, source in NUMERIC_COLUMNS.items():
+            metadata[target] = _numeric_column(chunk[source])
+        # Products without a scraped id are keyed by title, as in the scrape orchestrator
+        keys = chunk["product_id"].where(~chunk["product_id"].isin(["", "N/A"]), chunk["product_title"])
+        return [Document(id=document_id(key), page_content=content, metadata=meta)
+                for key, content, meta in zip(keys.tolist(), page_content.tolist(), metadata.to_dict("records"))]
 
     def transform_data(self):
         """
-        Transform the loaded data into list of LangChain Document objects.
-        """
-        product_list = []
-
-        for _, row in self.product_data.iterrows():
-            product_entry = {
-                    "product_id": row["product_id"],
-                    "product_title": row["product_title"],
-                    "rating": row["rating"],
-                    "total_reviews": row["total_reviews"],
-                    "price": row["price"],
-                    "top_reviews": row["top_reviews"]
-                }
-            product_list.append(product_entry)
-
-        documents = []
-        for entry in product_list:
-            metadata = {
-                    "product_id": entry["product_id"],
-                    "product_title": entry["product_title"],
-                    "rating": entry["rating"],
-                    "total_reviews": entry["total_reviews"],
-                    "price": entry["price"]
-            }
-            # Create custom Document with reviews as content and rest of the info as metadata
-            doc = Document(page_content=",".join([str(k)+":"+str(v) for k,v in entry.items()]), 
-                           metadata=metadata)
-            documents.append(doc)
-
+        Transform the CSV into a list of LangChain Document objects.
+        Holds every document in memory; use iter_document_batches for large files.
+        """
+        documents = [doc for batch in self.iter_document_batches() for doc in batch]
         print(f"Transformed {len(documents)} documents.")
         return documents
 
@@ -103,25 +122,205 @@ class DataIngestion:
         """
         Store the transformed data in the vector database.
         """
+        return self.store_batches([documents])
+
+    def store_batches(self, batches: Iterable[List[Document]], progress=None, full_refresh: bool = False,
+                      embeddings=None, delete_missing: bool = None):
+        """
+        Store Document batches incrementally, through the IngestPipeline (batched, concurrent embed
+        and insert with retries).
+
+        Documents carry deterministic ids, so storing a product again upserts it. Only documents
+        that are new or changed since the last run (per the ingest manifest) are embedded and
+        inserted; unchanged ones keep their stored vectors. Products no longer in the batches are
+        deleted from the store, or kept and marked stale when `ingestion.delete_missing` (or the
+        delete_missing argument) is off or when any batch failed; nothing is deleted if the
+        batches could not be read to the end.
+        The lexical snapshot and the adjacency index are rewritten to the full current catalog.
+        full_refresh re-embeds every document. progress(inserted, failed, seconds) is called
+        after every inserted batch. embeddings defaults to the configured embedding model.
+        """
         collection_name=self.config["astra_db"]["collection_name"]
-        vstore = AstraDBVectorStore(
-            embedding= self.model_loader.load_embeddings(),
-            collection_name=collection_name,
+        settings = self.config.get("ingestion", {})
+        # The pipeline hands its vectors to the store's inserts through this wrapper
+        embeddings = PrecomputedEmbeddings(embeddings or self.model_loader.load_embeddings())
+        vstore = create_vector_store(
+            self.config,
+            embeddings,
             api_endpoint=self.db_api_endpoint,
             token=self.db_application_token,
             namespace=self.db_keyspace,
         )
+        # Serving processes build the in-memory BM25 index from this snapshot
+        index_dir = self.config.get("retriever", {}).get("index_dir", "data")
+        snapshot_path = documents_path(collection_name, index_dir)
+        manifest = IngestManifest(manifest_path(collection_name, index_dir),
+                                  self.config.get("embedding_model", {}).get("model_name", ""))
+        if full_refresh:
+            manifest.hashes = dict.fromkeys(manifest.hashes, "")
+        adjacency = AdjacencyWriter(collection_name, index_dir)
+        save_documents([], snapshot_path + ".tmp")
+        # The feeder thread (unchanged documents) and this thread (inserted ones) both write the files
+        write_lock = threading.Lock()
+        inserted_ids, unchanged = [], [0]
+
+        def write(documents, vectors=None):
+            with write_lock:
+                save_documents(documents, snapshot_path + ".tmp", append=True)
+                ids = [doc.id for doc in documents]
+                if vectors is None:
+                    adjacency.carry(ids, documents)
+                else:
+                    adjacency.add(ids, documents, vectors)
 
-        inserted_ids = vstore.add_documents(documents)
-        print(f"Successfully inserted {len(inserted_ids)} documents into AstraDB.")
+        def changed_batches():
+            for batch in batches:
+                changed, same = manifest.split(batch)
+                # Without a previous vector to carry over, an unchanged document is embedded again
+                kept = [doc for doc in same if doc.id in adjacency.previous_rows]
+                changed += [doc for doc in same if doc.id not in adjacency.previous_rows]
+                if kept:
+                    write(kept)
+                    unchanged[0] += len(kept)
+                if changed:
+                    yield changed
+
+        def on_inserted(documents, ids, vectors):
+            write(documents, vectors)
+            manifest.record(documents)
+            inserted_ids.extend(ids)
+
+        report = IngestPipeline.from_config(vstore, embeddings).run(changed_batches(), on_inserted=on_inserted,
+                                                                    progress=progress)
+        deleted = 0
+        print(f"{report} into {type(vstore).__name__}; {unchanged[0]} unchanged documents skipped"
+              + (f", {manifest.duplicates} duplicate rows ignored" if manifest.duplicates else ""))
+        for failed in report.failed_batches:
+            print(f"Failed batch {failed.batch} at {failed.stage} ({failed.documents} documents): {failed.error}")
+
+        if any(failed.stage == "read" for failed in report.failed_batches):
+            # Only part of the catalog was read: which products are missing is unknown, and the
+            # snapshot and adjacency index would be partial, so keep the previous ones
+            adjacency.abort()
+            os.remove(snapshot_path + ".tmp")
+            print("The CSV could not be read to the end; no documents deleted, indexes left unchanged.")
+        else:
+            missing = manifest.missing(adjacency.previous_rows)
+            if delete_missing is None:
+                delete_missing = settings.get("delete_missing", True)
+            if missing and delete_missing and not report.failed_batches:
+                try:
+                    vstore.delete(missing)
+                    manifest.forget(missing)
+                    deleted = len(missing)
+                    print(f"Deleted {deleted} documents no longer in the CSV.")
+                except Exception as e:
+                    manifest.mark_stale(missing)
+                    print(f"Could not delete {len(missing)} missing documents, kept as stale: {e}")
+            elif missing:
+                # With failed batches the run is incomplete; a clean run deletes the stale ids
+                manifest.mark_stale(missing)
+                print(f"{len(missing)} documents no longer in the CSV are marked stale in {manifest.path}.")
+            adjacency.close()
+            os.replace(snapshot_path + ".tmp", snapshot_path)
+        manifest.save()
+        compact_store(vstore)
+        if inserted_ids or deleted:
+            # Cached answers were generated from the previous contents of the collection
+            bump_collection_version(collection_name, self.config.get("semantic_cache", {}).get("version_dir", "data"))
         return vstore, inserted_ids
 
-    def run_pipeline(self):
+    def _artifact_path(self):
+        path = self.config.get("ingestion", {}).get("artifact", {}).get("path", "data/artifacts/products")
+        return path if os.path.isabs(path) else os.path.join(os.getcwd(), path)
+
+    def embed_artifact(self, batches: Iterable[List[Document]] = None, progress=None,
+                       full_refresh: bool = False) -> EmbeddingArtifact:
+        """
+        Embed stage: write the CSV's documents and their vectors to the embedding artifact
+        (`ingestion.artifact.path`), without touching the vector store. Documents whose text is
+        unchanged since the previous artifact keep its vectors unless full_refresh is set.
+        """
+        path = self._artifact_path()
+        model_name = self.config.get("embedding_model", {}).get("model_name", "")
+        previous = EmbeddingArtifact.open(path)
+        if previous is not None and (full_refresh or previous.embedding_model != model_name):
+            previous = None
+        writer = ArtifactWriter(path, model_name)
+        # The feeder thread (carried documents) and this thread (embedded ones) both write the files
+        write_lock = threading.Lock()
+        seen, carried = set(), [0]
+
+        def changed_batches():
+            for batch in (batches if batches is not None else self.iter_document_batches()):
+                changed, same = [], []
+                for doc in batch:
+                    if doc.id in seen:
+                        continue
+                    seen.add(doc.id)
+                    # Unchanged: the previous artifact holds this exact text under this id
+                    if previous is not None and \
+                            previous.rows_by_hash.get(content_hash(doc), -1) == previous.rows_by_id.get(doc.id):
+                        same.append(doc)
+                    else:
+                        changed.append(doc)
+                if same:
+                    with write_lock:
+                        writer.carry(same, previous)
+                    carried[0] += len(same)
+                if changed:
+                    yield changed
+
+        def on_embedded(documents, ids, vectors):
+            with write_lock:
+                writer.add(documents, vectors)
+
+        # No vector store: the pipeline only runs its embed stage
+        report = IngestPipeline.from_config(None, self.model_loader.load_embeddings()).run(
+            changed_batches(), on_inserted=on_embedded, progress=progress)
+        # Products of failed batches are left out; loading this artifact must not delete them
+        writer.close(complete=not report.failed_batches)
+        print(f"Embedded {report.inserted} documents in {report.seconds:.1f}s, kept {carried[0]} vectors "
+              f"from the previous artifact; {writer.count} documents in {path}")
+        for failed in report.failed_batches:
+            print(f"Failed batch {failed.batch} at {failed.stage} ({failed.documents} documents): {failed.error}")
+        return EmbeddingArtifact(path)
+
+    def load_artifact(self, artifact: EmbeddingArtifact = None, progress=None, full_refresh: bool = False):
+        """
+        Load stage: push the embedding artifact into the configured vector store (see store_batches)
+        with vectors served from the artifact, so no documents are sent to the embedding API.
+        An incomplete artifact (failed embed batches) never deletes products from the store.
+        """
+        artifact = artifact or EmbeddingArtifact.open(self._artifact_path())
+        if artifact is None:
+            raise FileNotFoundError(f"No embedding artifact at {self._artifact_path()}; run the embed stage first")
+        model_name = self.config.get("embedding_model", {}).get("model_name", "")
+        if artifact.embedding_model != model_name:
+            raise ValueError(f"Artifact at {artifact.path} was embedded with {artifact.embedding_model}, "
+                             f"but the configured embedding model is {model_name}")
+        if not artifact.complete:
+            print(f"Artifact at {artifact.path} is missing documents from failed embed batches; "
+                  "products not in it are marked stale instead of deleted")
+        # Queries (the sample search) still go to the embedding model
+        embeddings = ArtifactEmbeddings(artifact, fallback=self.model_loader.load_embeddings())
+        return self.store_batches(artifact.iter_document_batches(self.chunk_size), progress=progress,
+                                  full_refresh=full_refresh, embeddings=embeddings,
+                                  delete_missing=None if artifact.complete else False)
+
+    def run_pipeline(self, progress=None, full_refresh: bool = False):
         """
         Run the complete data ingestion pipeline.
+        progress(inserted, failed, seconds) is called as batches are stored (e.g. from scrapper_ui.py).
+        Only new and changed products are embedded unless full_refresh is set. With
+        `ingestion.artifact.enabled`, documents are embedded into the artifact first and then loaded.
         """
-        documents = self.transform_data()
-        vstore, _ = self.store_in_vector_db(documents)
+        if self.config.get("ingestion", {}).get("artifact", {}).get("enabled", False):
+            artifact = self.embed_artifact(full_refresh=full_refresh)
+            vstore, _ = self.load_artifact(artifact, progress=progress, full_refresh=full_refresh)
+        else:
+            vstore, _ = self.store_batches(self.iter_document_batches(), progress=progress,
+                                           full_refresh=full_refresh)
 
         # Optionally do a quick search
         query = "Can you tell me about the low budget phones?"
@@ -130,7 +329,20 @@ class DataIngestion:
         print(f"\nSample search results for query: '{query}'")
         for res in results:
             print(f"Content: {res.page_content}\nMetadata: {res.metadata}\n")
-    
+
+        print(f"Embedding cache stats: {CachedEmbeddings.stats()}")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest data/product_reviews.csv into the vector store.")
+    parser.add_argument("stage", nargs="?", choices=["all", "embed", "load"], default="all",
+                        help="embed: CSV -> embedding artifact; load: artifact -> vector store; all: run_pipeline")
+    parser.add_argument("--full-refresh", action="store_true", help="Re-embed and re-insert every document")
+    args = parser.parse_args()
     ingestion = DataIngestion()
-    ingestion.run_pipeline()
\ No newline at end of file
+    if args.stage == "embed":
+        ingestion.embed_artifact(full_refresh=args.full_refresh)
+    elif args.stage == "load":
+        ingestion.load_artifact(full_refresh=args.full_refresh)
+    else:
+        ingestion.run_pipeline(full_refresh=args.full_refresh)
@@ -3,104 +3,328 @@ import time
 import re
 import os
 from bs4 import BeautifulSoup # for parsing HTML content
+import requests # pooled HTTP fetches for server-rendered pages
+from requests.adapters import HTTPAdapter
 import undetected_chromedriver as uc # to avoid bot detection
 from selenium.webdriver.common.by import By # helps to locate elements on a web page
 from selenium.webdriver.common.keys import Keys # provides keys in the keyboard like RETURN, F1, ALT etc. for sending keyboard actions
 from selenium.webdriver.common.action_chains import ActionChains # helps to perform complex user interactions like hover, drag and drop etc.
+from selenium.webdriver.support.ui import WebDriverWait # polls a condition until it holds or times out
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from prod_assistant.utils.metrics import METRICS
+
+POPUP_XPATH = "//button[contains(text(), '✕')]" # Login popup close button
+PRODUCT_SELECTOR = "div[data-id]" # Product cards on a search page
+REVIEW_SELECTOR = "div._27M-vq, div.col.EPCmJX, div._6K-7Co" # Adjusted selectors to capture various review formats
+# Idle time of the fixed sleeps the waits replaced, used to report the latency saved
+FIXED_WAIT_SECONDS = {"search": 6.0, "review": 11.0}
+
+
+class BrowserSession:
+    """
+    One warm Chrome reused across search and review pages.
+
+    The browser is started on first use and recycled (quit and restarted on the next page) after
+    max_pages pages, to bound memory growth, or when it crashes. Each page is timed and recorded
+    in METRICS as scraper.<kind>_page_seconds.
+    """
+
+    def __init__(self, max_pages=20, page_retries=1, headless=False, throttle=None):
+        self.max_pages = max_pages
+        self.page_retries = page_retries
+        self.headless = headless
+        self.throttle = throttle # called with the url before every page load (politeness limits)
+        self.driver = None
+        self.pages = 0
+
+    def _start(self):
+        options = uc.ChromeOptions() # A fresh options object per launch; uc refuses to reuse one
+        options.add_argument("--no-sandbox") # Bypass OS security model
+        options.add_argument("--disable-blink-features=AutomationControlled") # Avoid detection
+        if self.headless:
+            options.add_argument("--headless=new")
+        start = time.perf_counter()
+        self.driver = uc.Chrome(options=options, use_subprocess=True)
+        self.pages = 0
+        METRICS.incr("scraper.browser_starts")
+        METRICS.observe("scraper.browser_start_seconds", time.perf_counter() - start)
+
+    def recycle(self):
+        """Quit the current browser; the next page starts a new one."""
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Error occurred while closing browser: {e}")
+        self.driver = None
+
+    def run(self, url, kind, action):
+        """
+        Load url and return action(driver). A crashed browser is replaced and the page retried.
+        """
+        for attempt in range(self.page_retries + 1):
+            if self.driver is None:
+                self._start()
+            if self.throttle is not None:
+                self.throttle(url)
+            start = time.perf_counter()
+            try:
+                self.driver.get(url)
+                result = action(self.driver)
+            except WebDriverException as e:
+                print(f"Browser failed on {url} (attempt {attempt + 1}): {e.msg}")
+                METRICS.incr("scraper.browser_crashes")
+                self.recycle()
+                if attempt == self.page_retries:
+                    raise
+                continue
+            elapsed = time.perf_counter() - start
+            self.pages += 1
+            METRICS.observe(f"scraper.{kind}_page_seconds", elapsed)
+            print(f"Scraped {kind} page in {elapsed:.1f}s (browser page {self.pages}/{self.max_pages}): {url}")
+            if self.pages >= self.max_pages:
+                self.recycle()
+            return result
+
+    def close(self):
+        self.recycle()
+
+
+class HttpFetcher:
+    """
+    Plain HTTP GETs over a pooled keep-alive session with browser-like headers.
+    Returns the page HTML, or None on any error or non-200 response so the caller can fall back.
+    """
+
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/124.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+    }
+
+    def __init__(self, timeout_seconds=10, pool_size=4, throttle=None):
+        self.timeout_seconds = timeout_seconds
+        self.throttle = throttle
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url):
+        if self.throttle is not None:
+            self.throttle(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout_seconds)
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"HTTP fetch of {url} returned {response.status_code}")
+            return None
+        return response.text
+
+    def close(self):
+        self.session.close()
+
 
 class FlipkartScraper:
-    def __init__(self, output_dir = "data"):
+    def __init__(self, output_dir = "data", max_pages_per_browser = 20, headless = False, throttle = None,
+                 base_url = "https://www.flipkart.com", page_timeout_seconds = 10, scroll_timeout_seconds = 2,
+                 max_scrolls = 4, http_first = True, http_timeout_seconds = 10):
         """
         Initialize the FlipkartScraper class.
+        With http_first, every page is first fetched over plain HTTP and parsed from the server-rendered
+        HTML; the browser is only used when the needed fields are missing there.
+        Search and review pages share one browser session; call close() (or use the scraper as a
+        context manager) to quit it. base_url can point at a local server holding saved pages.
+        Pages are read as soon as their content appears (at most page_timeout_seconds); review pages
+        are scrolled until enough reviews are loaded or a scroll loads nothing new within
+        scroll_timeout_seconds, at most max_scrolls times.
         """
         self.output_dir = output_dir
+        self.base_url = base_url.rstrip("/")
+        self.page_timeout_seconds = page_timeout_seconds
+        self.scroll_timeout_seconds = scroll_timeout_seconds
+        self.max_scrolls = max_scrolls
         os.makedirs(self.output_dir, exist_ok=True)
+        self.browser = BrowserSession(max_pages=max_pages_per_browser, headless=headless, throttle=throttle)
+        self.http = HttpFetcher(timeout_seconds=http_timeout_seconds, throttle=throttle) if http_first else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.browser.close()
+        if self.http is not None:
+            self.http.close()
+
+    def _via_http(self, url, kind, parse, enough=bool):
+        """
+        parse(html) on the plain HTTP response, or None when it lacks the needed fields (enough(result)
+        is false). Pages that fall back to the browser are counted as scraper.<kind>_pages.browser_fallback
+        only; scraper.<kind>_pages.browser counts pages loaded in the browser with HTTP disabled.
+        """
+        if self.http is None:
+            return None
+        start = time.perf_counter()
+        html = self.http.fetch(url)
+        result = parse(html) if html else None
+        if not result or not enough(result):
+            METRICS.incr(f"scraper.{kind}_pages.browser_fallback")
+            print(f"Falling back to the browser for {kind} page: {url}")
+            return None
+        elapsed = time.perf_counter() - start
+        METRICS.incr(f"scraper.{kind}_pages.http")
+        METRICS.observe(f"scraper.{kind}_page_seconds", elapsed)
+        print(f"Scraped {kind} page in {elapsed:.1f}s (http): {url}")
+        return result
 
     def get_top_reviews(self, product_url, count=2):
         """
         Get top reviews for a product.
         """
-        options = uc.ChromeOptions() # Create Chrome options to run the browser in headless mode
-        options.add_argument("--no-sandbox") # Bypass OS security model
-        options.add_argument("--disable-blink-features=AutomationControlled") # Avoid detection
-        driver = uc.Chrome(options=options,use_subprocess=True)
-
         if not product_url.startswith("http"):
             return "No reviews found"
 
         try:
-            driver.get(product_url)
-            time.sleep(4)
-            try:
-                driver.find_element(By.XPATH, "//button[contains(text(), '✕')]").click() # Close login popup if it appears
-                time.sleep(1)
-            except Exception as e:
-                print(f"Error occurred while closing popup: {e}")
+            # Fewer reviews than asked for in the static HTML: the rest may load on scroll
+            reviews = self._via_http(product_url, "review", lambda html: self._parse_reviews(html, count),
+                                     enough=lambda reviews: len(reviews) >= count)
+            if reviews is None:
+                reviews = self.browser.run(product_url, "review", lambda driver: self._extract_reviews(driver, count))
+                if self.http is None:
+                    METRICS.incr("scraper.review_pages.browser")
+        except Exception:
+            reviews = []
+        return " || ".join(reviews) if reviews else "No reviews found"
+
+    # ---------- Waits ----------
+    def _wait_for(self, driver, selector, timeout):
+        """Wait until at least one element matches selector; False on timeout."""
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, selector))
+            return True
+        except TimeoutException:
+            return False
 
-            for _ in range(4):
-                ActionChains(driver).send_keys(Keys.END).perform()
-                time.sleep(1.5)
+    def _close_popup(self, driver):
+        """Close the login popup if it is showing; never waits for one to appear."""
+        popups = driver.find_elements(By.XPATH, POPUP_XPATH)
+        if not popups:
+            return
+        try:
+            popups[0].click()
+            WebDriverWait(driver, 2, poll_frequency=0.1).until(lambda d: not d.find_elements(By.XPATH, POPUP_XPATH))
+        except Exception as e:
+            print(f"Error occurred while closing popup: {e}")
 
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            review_blocks = soup.select("div._27M-vq, div.col.EPCmJX, div._6K-7Co") # Adjusted selectors to capture various review formats
-            seen = set()
-            reviews = []
+    @staticmethod
+    def _record_wait(kind, started):
+        waited = time.perf_counter() - started
+        METRICS.observe(f"scraper.{kind}_wait_seconds", waited)
+        METRICS.observe(f"scraper.{kind}_wait_saved_seconds", max(FIXED_WAIT_SECONDS[kind] - waited, 0.0))
 
-            for block in review_blocks:
-                text = block.get_text(separator=" ", strip=True)
-                if text and text not in seen:
-                    reviews.append(text)
-                    seen.add(text)
-                if len(reviews) >= count:
-                    break
-        except Exception:
-            reviews = []
+    @staticmethod
+    def _parse_reviews(page_source, count):
+        soup = BeautifulSoup(page_source, "lxml")
+        seen = set()
+        reviews = []
+        for block in soup.select(REVIEW_SELECTOR):
+            text = block.get_text(separator=" ", strip=True)
+            if text and text not in seen:
+                reviews.append(text)
+                seen.add(text)
+            if len(reviews) >= count:
+                break
+        return reviews
 
-        driver.quit()
-        return " || ".join(reviews) if reviews else "No reviews found"
+    def _extract_reviews(self, driver, count):
+        started = time.perf_counter()
+        self._wait_for(driver, REVIEW_SELECTOR, self.page_timeout_seconds)
+        self._close_popup(driver)
+
+        # Scroll only while more reviews are needed and each scroll still loads new ones
+        reviews = self._parse_reviews(driver.page_source, count)
+        for _ in range(self.max_scrolls):
+            if len(reviews) >= count:
+                break
+            loaded = len(driver.find_elements(By.CSS_SELECTOR, REVIEW_SELECTOR))
+            ActionChains(driver).send_keys(Keys.END).perform()
+            try:
+                WebDriverWait(driver, self.scroll_timeout_seconds, poll_frequency=0.2).until(
+                    lambda d: len(d.find_elements(By.CSS_SELECTOR, REVIEW_SELECTOR)) > loaded)
+            except TimeoutException:
+                break
+            reviews = self._parse_reviews(driver.page_source, count)
+        self._record_wait("review", started)
+        return reviews
 
     def scrape_flipkart_products(self, query, max_products=1, review_count=2):
         """
         Scrape Flipkart products based on the search query.
         """
-        options = uc.ChromeOptions()
-        driver = uc.Chrome(options=options,use_subprocess=True)
-        search_url = f"https://www.flipkart.com/search?q={query.replace(' ', '+')}" # Construct search URL
-        driver.get(search_url)
-        time.sleep(4)
+        # Review pages are loaded in the same browser, so the search results are read out first
+        products = []
+        for product_id, title, rating, total_reviews, price, product_link in self.search_listings(query, max_products):
+            top_reviews = self.get_top_reviews(product_link, count=review_count) if self.is_product_url(product_link) else "Invalid product URL"
+            products.append([product_id, title, rating, total_reviews, price, top_reviews])
+        return products
 
-        try:
-            driver.find_element(By.XPATH, "//button[contains(text(), '✕')]").click() # Close login popup if it appears
-        except Exception as e:
-            print(f"Error occurred while closing popup: {e}")
+    def search_listings(self, query, max_products=1):
+        """
+        (product_id, title, rating, total_reviews, price, product_link) for the top search results.
+        """
+        search_url = f"{self.base_url}/search?q={query.replace(' ', '+')}" # Construct search URL
+        listings = self._via_http(search_url, "search", lambda html: self._parse_listings(html, max_products))
+        if listings is None:
+            listings = self.browser.run(search_url, "search", lambda driver: self._extract_listings(driver, max_products))
+            if self.http is None:
+                METRICS.incr("scraper.search_pages.browser")
+        return listings
 
-        time.sleep(2)
-        products = []
+    def is_product_url(self, url):
+        return url.startswith(self.base_url)
+
+    def _extract_listings(self, driver, max_products):
+        started = time.perf_counter()
+        if not self._wait_for(driver, PRODUCT_SELECTOR, self.page_timeout_seconds):
+            print(f"No products rendered within {self.page_timeout_seconds}s: {driver.current_url}")
+        self._close_popup(driver)
+        self._record_wait("search", started)
+        return self._parse_listings(driver.page_source, max_products)
 
-        items = driver.find_elements(By.CSS_SELECTOR, "div[data-id]")[:max_products] # Select product items
+    def _parse_listings(self, page_source, max_products):
+        """Listings from search page HTML, whether rendered by the browser or served over HTTP."""
+        soup = BeautifulSoup(page_source, "lxml")
+        listings = []
+
+        items = soup.select(PRODUCT_SELECTOR)[:max_products] # Select product items
         for item in items:
             try:
-                title = item.find_element(By.CSS_SELECTOR, "div.KzDlHZ").text.strip() # Product title
-                price = item.find_element(By.CSS_SELECTOR, "div.Nx9bqj").text.strip() # Product price
-                rating = item.find_element(By.CSS_SELECTOR, "div.XQDdHH").text.strip() # Product rating
-                reviews_text = item.find_element(By.CSS_SELECTOR, "span.Wphh3N").text.strip() # Product reviews text
+                title = item.select_one("div.KzDlHZ").get_text(" ", strip=True) # Product title
+                price = item.select_one("div.Nx9bqj").get_text(" ", strip=True) # Product price
+                rating = item.select_one("div.XQDdHH").get_text(" ", strip=True) # Product rating
+                reviews_text = item.select_one("span.Wphh3N").get_text(" ", strip=True) # Product reviews text
                 match = re.search(r"\d+(,\d+)?(?=\s+Reviews)", reviews_text) # Extract number of reviews
                 total_reviews = match.group(0) if match else "N/A" # Default to "N/A" if not found
 
-                link_el = item.find_element(By.CSS_SELECTOR, "a[href*='/p/']") # Product link element
-                href = link_el.get_attribute("href") # Extract href attribute
-                product_link = href if href.startswith("http") else "https://www.flipkart.com" + href # Complete URL if relative
+                href = item.select_one("a[href*='/p/']")["href"] # Product link
+                product_link = href if href.startswith("http") else self.base_url + href # Complete URL if relative
                 match = re.findall(r"/p/(itm[0-9A-Za-z]+)", href) # Extract product ID from URL
                 product_id = match[0] if match else "N/A" # Default to "N/A" if not found
             except Exception as e:
                 print(f"Error occurred while processing item: {e}")
                 continue
 
-            top_reviews = self.get_top_reviews(product_link, count=review_count) if "flipkart.com" in product_link else "Invalid product URL"
-            products.append([product_id, title, rating, total_reviews, price, top_reviews])
-
-        driver.quit()
-        return products
+            listings.append((product_id, title, rating, total_reviews, price, product_link))
+        return listings
 
     def save_to_csv(self, data, filename= "product_reviews.csv"):
         """
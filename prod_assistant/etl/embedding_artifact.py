@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from prod_assistant.etl.ingest_manifest import content_hash, text_hash
+from prod_assistant.retriever.adjacency import finish_npy
+from prod_assistant.utils.metrics import METRICS
+
+
+def _json_default(o):
+    # pandas rows carry numpy scalars
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+class EmbeddingArtifact:
+    """
+    Embedded documents on disk, independent of any vector store. A directory holds:
+
+    - documents.jsonl: id, page_content, metadata and content hash per row.
+    - vectors.npy: float32 embeddings, row-aligned with documents.jsonl, memory-mapped on open.
+    - meta.json: embedding model, dimension, row count, creation time and whether every document
+      was embedded (complete), written last.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.rows_by_id: Dict[str, int] = {}
+        self.rows_by_hash: Dict[str, int] = {}
+        with open(os.path.join(path, "documents.jsonl"), encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                record = json.loads(line)
+                self.rows_by_id[record["id"]] = row
+                self.rows_by_hash[record["hash"]] = row
+
+    @classmethod
+    def open(cls, path: str) -> Optional["EmbeddingArtifact"]:
+        """The artifact at path, or None if no complete one has been written there."""
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        return cls(path)
+
+    @property
+    def embedding_model(self) -> str:
+        return self.meta["embedding_model"]
+
+    @property
+    def complete(self) -> bool:
+        return self.meta.get("complete", True)
+
+    def __len__(self):
+        return len(self.rows_by_id)
+
+    def iter_document_batches(self, batch_size: int = 10000) -> Iterator[List[Document]]:
+        batch = []
+        with open(os.path.join(self.path, "documents.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                batch.append(Document(id=record["id"], page_content=record["page_content"],
+                                      metadata=record["metadata"]))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+class ArtifactWriter:
+    """
+    Streams embedded documents into an artifact directory. Files are written next to the previous
+    artifact's and swapped in on close, so the previous one can be read (and carried from) meanwhile.
+    """
+
+    def __init__(self, path: str, embedding_model: str):
+        self.path = path
+        self.embedding_model = embedding_model
+        os.makedirs(path, exist_ok=True)
+        self._documents = open(self._file("documents.jsonl.tmp"), "w", encoding="utf-8")
+        self._vectors = open(self._file("vectors.npy.raw"), "wb")
+        self.count = 0
+        self.dim = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def add(self, documents: Sequence[Document], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            self.dim = vectors.shape[1]
+        for doc in documents:
+            record = {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata,
+                      "hash": content_hash(doc)}
+            self._documents.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+        self._vectors.write(vectors.tobytes())
+        self.count += len(documents)
+
+    def carry(self, documents: Sequence[Document], previous: EmbeddingArtifact):
+        """Add documents with their vectors from a previous artifact (matched by id)."""
+        rows = [previous.rows_by_id[doc.id] for doc in documents]
+        self.add(documents, previous.vectors[rows] if rows else [])
+
+    def close(self, complete: bool = True):
+        """complete=False records that some documents failed to embed and are not in the artifact."""
+        self._documents.close()
+        self._vectors.close()
+        finish_npy(self._file("vectors.npy.raw"), self._file("vectors.npy.tmp"), self.count, self.dim)
+        # meta.json goes last: an artifact without it is incomplete and ignored by open()
+        if os.path.exists(self._file("meta.json")):
+            os.remove(self._file("meta.json"))
+        os.replace(self._file("vectors.npy.tmp"), self._file("vectors.npy"))
+        os.replace(self._file("documents.jsonl.tmp"), self._file("documents.jsonl"))
+        meta = {"embedding_model": self.embedding_model, "dim": self.dim, "count": self.count,
+                "created_at": time.time(), "complete": complete}
+        with open(self._file("meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+class ArtifactEmbeddings(Embeddings):
+    """
+    Serves document embeddings from an EmbeddingArtifact (matched by text), so loading the artifact
+    into a vector store makes no embedding API calls. Texts not in the artifact and queries go to
+    the fallback model, if given.
+    """
+
+    def __init__(self, artifact: EmbeddingArtifact, fallback: Optional[Embeddings] = None):
+        self.artifact = artifact
+        self.fallback = fallback
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        rows = [self.artifact.rows_by_hash.get(text_hash(text)) for text in texts]
+        missing = [text for text, row in zip(texts, rows) if row is None]
+        if missing:
+            fallback = iter(self._require_fallback(f"{len(missing)} texts not in it").embed_documents(missing))
+            METRICS.incr("artifact_embeddings.fallback", len(missing))
+        METRICS.incr("artifact_embeddings.hits", len(texts) - len(missing))
+        return [np.asarray(self.artifact.vectors[row], dtype=np.float32).tolist() if row is not None
+                else next(fallback) for row in rows]
+
+    def _require_fallback(self, texts: str) -> Embeddings:
+        if self.fallback is None:
+            raise ValueError(f"ArtifactEmbeddings needs a fallback embedding model to embed {texts}; the artifact "
+                             f"at {self.artifact.path} only holds its documents' vectors")
+        return self.fallback
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._require_fallback("queries").embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._require_fallback("queries").aembed_query(text)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, Iterable, List, Tuple
+
+from langchain_core.documents import Document
+
+# Document ids are uuid5(PRODUCT_NAMESPACE, product key), so re-ingesting a product upserts it
+PRODUCT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://www.flipkart.com/")
+
+
+def document_id(product_key: str) -> str:
+    """Deterministic vector store id for a product (its product_id, or its title when the id is N/A)."""
+    return str(uuid.uuid5(PRODUCT_NAMESPACE, product_key))
+
+
+def manifest_path(collection_name: str, index_dir: str = "data") -> str:
+    if not os.path.isabs(index_dir):
+        index_dir = os.path.join(os.getcwd(), index_dir)
+    return os.path.join(index_dir, f"{collection_name}.manifest.json")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(doc: Document) -> str:
+    """Hash of a product document's text; page_content carries every CSV field."""
+    return text_hash(doc.page_content)
+
+
+class IngestManifest:
+    """
+    Local record of what is in the collection: document id -> content hash of the stored version,
+    plus ids of products that dropped out of the CSV but are still in the store (stale).
+
+    split() sorts a batch into changed (new, edited, or never stored) and unchanged documents and
+    remembers every id seen in this run; record() commits the hashes of documents once they are
+    inserted, so a batch that failed is retried on the next run. Hashes are only trusted for the
+    embedding model they were written with.
+    """
+
+    def __init__(self, path: str, embedding_model: str = ""):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.hashes: Dict[str, str] = {}
+        self.stale: List[str] = []
+        self.seen: Dict[str, str] = {}  # id -> content hash, for documents read in this run
+        self.duplicates = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.hashes = data.get("documents", {})
+            self.stale = data.get("stale", [])
+            if data.get("embedding_model") != embedding_model:
+                print(f"Embedding model changed ({data.get('embedding_model')} -> {embedding_model}); "
+                      "re-embedding every document")
+                self.hashes = dict.fromkeys(self.hashes, "")
+
+    def split(self, documents: Iterable[Document]) -> Tuple[List[Document], List[Document]]:
+        changed, unchanged = [], []
+        for doc in documents:
+            if doc.id in self.seen:
+                # Same product listed twice in the CSV; its first row wins
+                self.duplicates += 1
+                continue
+            digest = content_hash(doc)
+            self.seen[doc.id] = digest
+            (unchanged if self.hashes.get(doc.id) == digest else changed).append(doc)
+        return changed, unchanged
+
+    def record(self, documents: Iterable[Document]):
+        for doc in documents:
+            self.hashes[doc.id] = self.seen[doc.id]
+
+    def missing(self, known_ids: Iterable[str] = ()) -> List[str]:
+        """Ids in the store (per the manifest or known_ids) whose product was not in this run."""
+        ids = dict.fromkeys(list(self.hashes) + self.stale + list(known_ids))
+        return [i for i in ids if i not in self.seen]
+
+    def mark_stale(self, ids: Iterable[str]):
+        """Keep ids that were left in the store so a later run can still delete them."""
+        ids = list(ids)
+        for i in ids:
+            self.hashes.pop(i, None)
+        self.stale = list(dict.fromkeys(self.stale + ids))
+
+    def forget(self, ids: Iterable[str]):
+        doomed = set(ids)
+        self.hashes = {i: h for i, h in self.hashes.items() if i not in doomed}
+        self.stale = [i for i in self.stale if i not in doomed]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"embedding_model": self.embedding_model, "documents": self.hashes, "stale": self.stale}, f)
+        os.replace(self.path + ".tmp", self.path)
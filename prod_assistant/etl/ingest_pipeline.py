@@ -0,0 +1,238 @@
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_DONE = object()
+
+
+@dataclass
+class FailedBatch:
+    batch: int
+    stage: str
+    documents: int
+    error: str
+
+
+@dataclass
+class IngestReport:
+    inserted: int = 0
+    seconds: float = 0.0
+    failed_batches: List[FailedBatch] = field(default_factory=list)
+
+    @property
+    def failed_documents(self) -> int:
+        return sum(f.documents for f in self.failed_batches)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"Inserted {self.inserted} documents in {self.seconds:.1f}s ({self.docs_per_second:.1f} docs/sec), "
+                f"{len(self.failed_batches)} failed batches ({self.failed_documents} documents)")
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Embeddings for a vector store that can only embed its own inserts (AstraDB add_documents):
+    texts the pipeline has already embedded are served from a per-run map, anything else (and
+    every query) goes to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self._vectors: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def remember(self, texts: List[str], vectors: List[List[float]]):
+        with self._lock:
+            self._vectors.update(zip(texts, vectors))
+
+    def forget(self, texts: List[str]):
+        with self._lock:
+            for text in texts:
+                self._vectors.pop(text, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            known = [self._vectors.get(text) for text in texts]
+        missing = [text for text, vector in zip(texts, known) if vector is None]
+        if not missing:
+            return known
+        embedded = iter(self.embeddings.embed_documents(missing))
+        return [vector if vector is not None else next(embedded) for vector in known]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+class IngestPipeline:
+    """
+    Embed-and-insert stage with separate embedding and insert worker threads.
+
+    Incoming Document batches are re-cut to batch_size and flow feeder -> embed workers -> insert
+    workers -> caller thread, over bounded queues so only a few batches are in flight at a time,
+    so embedding API calls overlap with vector store writes. Inserts reuse the embed stage's
+    vectors: through add_embeddings where the store has it (LocalVectorStore), otherwise through
+    a PrecomputedEmbeddings the store was created with. Each stage retries a failing batch with
+    exponential backoff; a batch that still fails is reported and skipped. on_inserted(documents,
+    ids, vectors) and progress(inserted, failed, seconds) run on the calling thread (safe for Streamlit).
+    Without a vstore only the embed stage runs and on_inserted receives every embedded batch.
+    """
+
+    def __init__(self, vstore: Optional[VectorStore], embeddings: Embeddings, batch_size: int = 100, embed_workers: int = 2,
+                 insert_workers: int = 4, max_retries: int = 3, backoff_seconds: float = 1.0):
+        self.vstore = vstore
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.insert_workers = insert_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    @classmethod
+    def from_config(cls, vstore: Optional[VectorStore], embeddings: Embeddings) -> "IngestPipeline":
+        """Build from the `ingestion` block in config.yaml."""
+        settings = load_config().get("ingestion", {})
+        return cls(vstore, embeddings, batch_size=settings.get("batch_size", 100),
+                   embed_workers=settings.get("embed_workers", 2), insert_workers=settings.get("insert_workers", 4),
+                   max_retries=settings.get("max_retries", 3), backoff_seconds=settings.get("backoff_seconds", 1.0))
+
+    # ---------- Stages ----------
+    def _retry(self, stage: str, batch: int, fn: Callable):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2 ** attempt * (0.5 + random.random())
+                METRICS.incr(f"ingest_pipeline.{stage}_retries")
+                log.warning("Ingest batch failed, retrying", stage=stage, batch=batch, attempt=attempt + 1,
+                            delay=round(delay, 2), error=str(e))
+                time.sleep(delay)
+
+    def _feed(self, batches: Iterable[List[Document]], embed_q: queue.Queue, done_q: queue.Queue):
+        number = 0
+        try:
+            pending: List[Document] = []
+            for batch in batches:
+                pending.extend(batch)
+                while len(pending) >= self.batch_size:
+                    embed_q.put((number, pending[:self.batch_size]))
+                    pending = pending[self.batch_size:]
+                    number += 1
+            if pending:
+                embed_q.put((number, pending))
+        except Exception as e:
+            # The source itself failed (e.g. a malformed CSV chunk); stop feeding
+            done_q.put(("failed", FailedBatch(number, "read", 0, f"{type(e).__name__}: {e}")))
+        finally:
+            for _ in range(self.embed_workers):
+                embed_q.put(_DONE)
+
+    def _embed(self, embed_q: queue.Queue, insert_q: queue.Queue, done_q: queue.Queue):
+        while (item := embed_q.get()) is not _DONE:
+            number, documents = item
+            texts = [doc.page_content for doc in documents]
+            try:
+                vectors = self._retry("embed", number, lambda: self.embeddings.embed_documents(texts))
+            except Exception as e:
+                done_q.put(("failed", FailedBatch(number, "embed", len(documents), f"{type(e).__name__}: {e}")))
+                continue
+            insert_q.put((number, documents, vectors))
+
+    def _insert(self, insert_q: queue.Queue, done_q: queue.Queue):
+        while (item := insert_q.get()) is not _DONE:
+            number, documents, vectors = item
+            try:
+                ids = [doc.id for doc in documents] if self.vstore is None else self._store(number, documents, vectors)
+            except Exception as e:
+                done_q.put(("failed", FailedBatch(number, "insert", len(documents), f"{type(e).__name__}: {e}")))
+                continue
+            done_q.put(("inserted", (documents, ids, vectors)))
+        done_q.put(_DONE)
+
+    def _store(self, number: int, documents: List[Document], vectors: List[List[float]]) -> List[str]:
+        texts = [doc.page_content for doc in documents]
+        if hasattr(self.vstore, "add_embeddings"):
+            return self._retry("insert", number, lambda: self.vstore.add_embeddings(
+                zip(texts, vectors), [doc.metadata for doc in documents], ids=[doc.id for doc in documents]))
+        if not isinstance(self.embeddings, PrecomputedEmbeddings):
+            return self._retry("insert", number, lambda: self.vstore.add_documents(documents))
+        self.embeddings.remember(texts, vectors)
+        try:
+            return self._retry("insert", number, lambda: self.vstore.add_documents(documents))
+        finally:
+            self.embeddings.forget(texts)
+
+    # ---------- Public API ----------
+    def run(self, batches: Iterable[List[Document]],
+            on_inserted: Optional[Callable[[List[Document], List[str], List[List[float]]], None]] = None,
+            progress: Optional[Callable[[int, int, float], None]] = None) -> IngestReport:
+        embed_q: queue.Queue = queue.Queue(maxsize=2 * self.embed_workers)
+        insert_q: queue.Queue = queue.Queue(maxsize=2 * self.insert_workers)
+        done_q: queue.Queue = queue.Queue()
+        feeder = threading.Thread(target=self._feed, args=(batches, embed_q, done_q), name="ingest-feed")
+        embedders = [threading.Thread(target=self._embed, args=(embed_q, insert_q, done_q), name=f"ingest-embed-{i}")
+                     for i in range(self.embed_workers)]
+        inserters = [threading.Thread(target=self._insert, args=(insert_q, done_q), name=f"ingest-insert-{i}")
+                     for i in range(self.insert_workers)]
+
+        def close_inserts():
+            # Insert workers stop once everything embedded has been queued for them
+            for thread in [feeder] + embedders:
+                thread.join()
+            for _ in inserters:
+                insert_q.put(_DONE)
+
+        threads = [feeder] + embedders + inserters + [threading.Thread(target=close_inserts, name="ingest-close")]
+
+        report = IngestReport()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        running_inserters = self.insert_workers
+        while running_inserters:
+            item = done_q.get()
+            if item is _DONE:
+                running_inserters -= 1
+                continue
+            kind, payload = item
+            if kind == "failed":
+                report.failed_batches.append(payload)
+                METRICS.incr("ingest_pipeline.failed_batches")
+                log.error("Ingest batch dropped", batch=payload.batch, stage=payload.stage,
+                          documents=payload.documents, error=payload.error)
+            else:
+                documents, ids, vectors = payload
+                if on_inserted is not None:
+                    on_inserted(documents, ids, vectors)
+                report.inserted += len(documents)
+            if progress is not None:
+                progress(report.inserted, report.failed_documents, time.perf_counter() - start)
+
+        report.seconds = time.perf_counter() - start
+        METRICS.observe("ingest_pipeline.docs_per_second", report.docs_per_second)
+        log.info("Ingest pipeline finished", inserted=report.inserted, seconds=round(report.seconds, 2),
+                 docs_per_second=round(report.docs_per_second, 1), failed_batches=len(report.failed_batches))
+        return report
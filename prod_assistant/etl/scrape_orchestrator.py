@@ -0,0 +1,210 @@
+import multiprocessing as mp
+import queue
+import time
+from urllib.parse import urlparse
+
+from prod_assistant.etl.data_scrapper import FlipkartScraper
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+
+
+class DomainThrottle:
+    """
+    Minimum spacing between page loads on the same domain, shared by all worker processes.
+    Each call reserves the next free slot for the url's domain under a lock and sleeps until it.
+    """
+
+    def __init__(self, manager, min_interval_seconds=1.0):
+        self.min_interval_seconds = min_interval_seconds
+        self._next_slot = manager.dict()
+        self._lock = manager.Lock()
+
+    def __call__(self, url):
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(domain, 0.0))
+            self._next_slot[domain] = slot + self.min_interval_seconds
+        if slot > now:
+            METRICS.observe("scraper.politeness_wait_seconds", slot - now)
+            time.sleep(slot - now)
+
+
+def _worker(jobs, results, scraper_kwargs):
+    """
+    Worker process: one FlipkartScraper (and so one warm browser) serving jobs until a None sentinel.
+    Jobs are ("search", key, query, max_products) or ("review", key, product_url, review_count).
+    Each result carries the worker's METRICS recorded since its previous result, merged by the parent.
+    """
+    with FlipkartScraper(**scraper_kwargs) as scraper:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            kind, key, target, count = job
+            try:
+                if kind == "search":
+                    result = scraper.search_listings(target, max_products=count)
+                else:
+                    result = scraper.get_top_reviews(target, count=count)
+                results.put((kind, key, result, None, METRICS.drain()))
+            except Exception as e:
+                results.put((kind, key, None, f"{type(e).__name__}: {e}", METRICS.drain()))
+
+
+class ParallelScraper:
+    """
+    Scrapes several queries at once with a bounded pool of browser worker processes.
+
+    Search jobs for every query go on a shared queue; each listing found becomes a review job
+    unless its product_id was already seen, so products are deduplicated before their review
+    pages are loaded. Page loads per domain are spaced by DomainThrottle. Rows come back in
+    query order, in the same format as FlipkartScraper.scrape_flipkart_products.
+    """
+
+    def __init__(self, workers=3, max_pages_per_browser=20, headless=True, min_interval_seconds=1.0,
+                 job_timeout_seconds=180, base_url="https://www.flipkart.com", waits=None, http_first=True,
+                 http_timeout_seconds=10):
+        self.workers = workers
+        self.min_interval_seconds = min_interval_seconds
+        self.job_timeout_seconds = job_timeout_seconds
+        # waits: FlipkartScraper page_timeout_seconds / scroll_timeout_seconds / max_scrolls
+        self.scraper_kwargs = {"max_pages_per_browser": max_pages_per_browser, "headless": headless,
+                               "base_url": base_url, "http_first": http_first,
+                               "http_timeout_seconds": http_timeout_seconds, **(waits or {})}
+        self.base_url = base_url.rstrip("/")
+
+    @classmethod
+    def from_config(cls, **overrides):
+        """Build from the `scraper` block in config.yaml; keyword arguments take precedence."""
+        settings = load_config().get("scraper", {})
+        kwargs = {
+            "workers": settings.get("workers", 3),
+            "max_pages_per_browser": settings.get("max_pages_per_browser", 20),
+            "headless": settings.get("headless", True),
+            "min_interval_seconds": settings.get("politeness", {}).get("min_interval_seconds", 1.0),
+            "job_timeout_seconds": settings.get("job_timeout_seconds", 180),
+            "waits": settings.get("waits", {}),
+            "http_first": settings.get("http", {}).get("enabled", True),
+            "http_timeout_seconds": settings.get("http", {}).get("timeout_seconds", 10),
+        }
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    def scrape(self, queries, max_products=1, review_count=2, store=None):
+        """
+        Scrape all queries; returns [product_id, title, rating, total_reviews, price, top_reviews] rows.
+        With a ScrapeStore, fresh searches and products are served from it, every finished search and
+        product is checkpointed to it, and workers are only started if something is left to scrape.
+        """
+        if not queries:
+            return []
+        # spawn: Chrome/driver state must not be inherited through fork
+        ctx = mp.get_context("spawn")
+        start = time.perf_counter()
+        with ctx.Manager() as manager:
+            jobs, results = ctx.Queue(), ctx.Queue()
+            scraper_kwargs = dict(self.scraper_kwargs, throttle=DomainThrottle(manager, self.min_interval_seconds))
+            processes = []
+
+            def submit(job):
+                if not processes:
+                    processes.extend(ctx.Process(target=_worker, args=(jobs, results, scraper_kwargs), daemon=True)
+                                     for _ in range(min(self.workers, len(queries) * max(max_products, 1))))
+                    for process in processes:
+                        process.start()
+                jobs.put(job)
+
+            try:
+                rows = self._collect(queries, max_products, review_count, submit, results, processes, store)
+            finally:
+                for _ in processes:
+                    jobs.put(None)
+                for process in processes:
+                    process.join(timeout=30)
+                    if process.is_alive():
+                        process.terminate()
+        if store is not None:
+            store.compact()
+        METRICS.observe("scraper.parallel_run_seconds", time.perf_counter() - start)
+        print(f"Scraped {len(rows)} products for {len(queries)} queries with {len(processes)} workers "
+              f"in {time.perf_counter() - start:.1f}s")
+        return rows
+
+    def _collect(self, queries, max_products, review_count, submit, results, processes, store):
+        products = {}  # product_id -> ((query position, listing position), row); row[5] is None until reviewed
+        pending = 0
+        outstanding = set()  # (kind, key) of submitted jobs without a result
+
+        def submit_job(job):
+            outstanding.add(job[:2])
+            submit(job)
+
+        def add_listings(position, listings):
+            queued = 0
+            for index, (product_id, title, rating, total_reviews, price, link) in enumerate(listings):
+                product_key = product_id if product_id != "N/A" else title
+                if product_key in products:
+                    METRICS.incr("scraper.duplicate_products")
+                    continue
+                stored = store.fresh_row(product_id) if store is not None and product_id != "N/A" else None
+                if stored is not None:
+                    products[product_key] = ((position, index), stored)
+                elif link.startswith(self.base_url):
+                    products[product_key] = ((position, index), [product_id, title, rating, total_reviews, price, None])
+                    submit_job(("review", product_key, link, review_count))
+                    queued += 1
+                else:
+                    row = [product_id, title, rating, total_reviews, price, "Invalid product URL"]
+                    products[product_key] = ((position, index), row)
+                    if store is not None and product_id != "N/A":
+                        store.add_product(row)
+            return queued
+
+        for position, query in enumerate(queries):
+            listings = store.fresh_listings(query, max_products) if store is not None else None
+            if listings is not None:
+                pending += add_listings(position, listings)
+            else:
+                submit_job(("search", position, query, max_products))
+                pending += 1
+
+        while pending:
+            try:
+                kind, key, result, error, metrics = results.get(timeout=self.job_timeout_seconds)
+            except queue.Empty:
+                # No job finished within job_timeout_seconds: the workers left are stuck (a hung page
+                # load) or gone, so stop waiting; failed searches and products are retried next run
+                alive = [p for p in processes if p.is_alive()]
+                print(f"No scrape result for {self.job_timeout_seconds}s; giving up on {len(outstanding)} jobs "
+                      f"and terminating {len(alive)} workers")
+                for process in alive:
+                    process.terminate()
+                METRICS.incr("scraper.failed_jobs", len(outstanding))
+                METRICS.incr("scraper.timed_out_jobs", len(outstanding))
+                for kind, key in outstanding:
+                    print(f"Scrape {kind} job timed out for {queries[key] if kind == 'search' else key}")
+                break
+            pending -= 1
+            outstanding.discard((kind, key))
+            METRICS.merge(metrics)
+            if error:
+                METRICS.incr("scraper.failed_jobs")
+                print(f"Scrape {kind} job failed for {key}: {error}")
+                continue
+            if kind == "search":
+                if store is not None:
+                    store.add_search(queries[key], max_products, result)
+                pending += add_listings(key, result)
+            else:
+                row = products[key][1]
+                row[5] = result
+                if store is not None and row[0] != "N/A":
+                    store.add_product(row)
+
+        rows = []
+        for _, row in sorted(products.values(), key=lambda item: item[0]):
+            if row[5] is None:
+                row[5] = "No reviews found"
+            rows.append(row)
+        return rows
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+
+FIELDS = ["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"]
+
+
+def content_hash(row):
+    """Hash of a scraped row's fields, used to tell re-scraped but unchanged products apart."""
+    payload = json.dumps([str(v) for v in row[:len(FIELDS)]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ScrapeStore:
+    """
+    Append-only JSONL checkpoint of scraped products and search results.
+
+    Every finished product is appended (and fsynced) as {"kind": "product", fields..., scraped_at,
+    content_hash}; every finished search as {"kind": "search", query, max_products, listings,
+    scraped_at}. On load the latest record per product_id / query wins, so an interrupted run
+    resumes by skipping whatever is still fresh (younger than ttl_seconds). A partial last line
+    left by a crash is truncated before appending.
+    """
+
+    def __init__(self, path="data/scrape_store.jsonl", ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.products = {}  # product_id -> record
+        self.searches = {}  # query -> record
+        self._lines = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def from_config(cls):
+        """Build from `scraper.store` in config.yaml, or return None if disabled."""
+        settings = load_config().get("scraper", {}).get("store", {})
+        if not settings.get("enabled", False):
+            return None
+        return cls(settings.get("path", "data/scrape_store.jsonl"), settings.get("ttl_hours", 168) * 3600)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                self._lines += 1
+                if record.get("kind") == "search":
+                    self.searches[record["query"]] = record
+                else:
+                    self.products[record["product_id"]] = record
+        if good_offset != os.path.getsize(self.path):
+            print(f"Truncating partial record at byte {good_offset} of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+        print(f"Scrape store loaded: {len(self.products)} products, {len(self.searches)} searches from {self.path}")
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._lines += 1
+
+    def _fresh(self, record, now=None):
+        return record is not None and (now or time.time()) - record["scraped_at"] < self.ttl_seconds
+
+    # ---------- Products ----------
+    def fresh_row(self, product_id):
+        """The stored row for product_id if it was scraped within the TTL, else None."""
+        record = self.products.get(product_id)
+        if not self._fresh(record):
+            return None
+        METRICS.incr("scrape_store.fresh_hits")
+        return [record[field] for field in FIELDS]
+
+    def add_product(self, row):
+        """Checkpoint a finished product row; returns True if its content changed since the last scrape."""
+        digest = content_hash(row)
+        previous = self.products.get(row[0])
+        record = dict(zip(FIELDS, row), kind="product", scraped_at=time.time(), content_hash=digest)
+        self.products[row[0]] = record
+        self._append(record)
+        changed = previous is None or previous["content_hash"] != digest
+        METRICS.incr("scrape_store.changed" if changed else "scrape_store.unchanged")
+        return changed
+
+    # ---------- Searches ----------
+    def fresh_listings(self, query, max_products):
+        """Stored listings of a search scraped within the TTL with at least max_products results."""
+        record = self.searches.get(query)
+        if not self._fresh(record) or record["max_products"] < max_products:
+            return None
+        return [tuple(listing) for listing in record["listings"][:max_products]]
+
+    def add_search(self, query, max_products, listings):
+        record = {"kind": "search", "query": query, "max_products": max_products,
+                  "listings": [list(listing) for listing in listings], "scraped_at": time.time()}
+        self.searches[query] = record
+        self._append(record)
+
+    # ---------- Maintenance ----------
+    def compact(self):
+        """Rewrite the file with only the latest record per product and query."""
+        live = len(self.products) + len(self.searches)
+        if self._lines <= live:
+            return
+        self._file.close()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in list(self.searches.values()) + list(self.products.values()):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        print(f"Scrape store compacted from {self._lines} to {live} records")
+        self._lines = live
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
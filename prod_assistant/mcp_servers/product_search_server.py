@@ -1,41 +1,29 @@
 from mcp.server.fastmcp import FastMCP
 from prod_assistant.retriever.retrieval import Retriever 
+from prod_assistant.utils.admission import get_limiter
+from prod_assistant.utils.context_builder import format_docs
 from langchain_community.tools import DuckDuckGoSearchRun
 
 # Initialize MCP server
 mcp = FastMCP("hybrid_search")
 
-# Load retriever once
+# Retriever is shared by all tool calls; the vector store connection is opened on first use
 retriever_obj = Retriever()
-retriever = retriever_obj.load_retriever()
+
+# Bounds concurrent AstraDB retrievals issued by this server
+astra_db_limiter = get_limiter("astra_db")
 
 # LangChain DuckDuckGo tool
 duckduckgo = DuckDuckGoSearchRun()
 
-# ---------- Helpers ----------
-def format_docs(docs) -> str:
-    """Format retriever docs into readable context."""
-    if not docs:
-        return ""
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = (
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
-        )
-        formatted_chunks.append(formatted)
-    return "\n\n---\n\n".join(formatted_chunks)
-
 # ---------- MCP Tools ----------
 @mcp.tool()
 async def get_product_info(query: str) -> str:
     """Retrieve product information for a given query from local retriever."""
     try:
-        docs = retriever.invoke(query)
-        context = format_docs(docs)
+        async with astra_db_limiter:
+            docs = await retriever_obj.acall_retriever(query)
+        context = format_docs(docs, empty="")
         if not context.strip():
             return "No local results found."
         return context
@@ -0,0 +1,276 @@
+# retriever/adjacency.py
+import json
+import os
+import shutil
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from graph_retriever.adapters import Adapter
+from graph_retriever.content import Content
+from graph_retriever.edges import IdEdge, MetadataEdge
+from graph_retriever.utils.top_k import top_k
+from langchain_core.documents import Document
+from langchain_graph_retriever import GraphRetriever
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+# Per-query counter of store calls answered from memory; set by CachedGraphRetriever
+_ROUND_TRIPS_SAVED: ContextVar[Optional[List[int]]] = ContextVar("round_trips_saved", default=None)
+
+
+def adjacency_paths(collection_name: str, index_dir: str = "data") -> Tuple[str, str]:
+    """(records JSON, embeddings .npy) persisted next to the collection's document snapshot."""
+    if not os.path.isabs(index_dir):
+        index_dir = os.path.join(os.getcwd(), index_dir)
+    base = os.path.join(index_dir, f"{collection_name}.adjacency")
+    return base + ".json", base + ".npy"
+
+
+def finish_npy(raw_path: str, path: str, rows: int, dim: Optional[int]):
+    """Wrap a spool of raw float32 rows in an .npy header at path, removing the spool."""
+    with open(path, "wb") as out, open(raw_path, "rb") as raw:
+        header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False,
+                  "shape": (rows, dim or 0)}
+        np.lib.format.write_array_header_1_0(out, header)
+        shutil.copyfileobj(raw, out, 1 << 20)
+    os.remove(raw_path)
+
+
+class AdjacencyWriter:
+    """
+    Streams inserted documents, their ids and embeddings to the adjacency files batch by batch.
+    Vectors are spooled to a raw file and wrapped in an .npy header on close, so memory stays flat.
+    Documents that were not re-embedded (incremental ingestion) are copied over from the previous
+    files with carry(); the previous files are only replaced on close.
+    """
+
+    def __init__(self, collection_name: str, index_dir: str = "data"):
+        self.records_path, self.vectors_path = adjacency_paths(collection_name, index_dir)
+        os.makedirs(os.path.dirname(self.records_path), exist_ok=True)
+        self.previous_rows: Dict[str, int] = {}
+        self._previous_vectors = None
+        if os.path.exists(self.records_path) and os.path.exists(self.vectors_path):
+            with open(self.records_path, encoding="utf-8") as f:
+                self.previous_rows = {record["id"]: row for row, record in enumerate(json.load(f))}
+            self._previous_vectors = np.load(self.vectors_path, mmap_mode="r")
+        self._records = open(self.records_path + ".tmp", "w", encoding="utf-8")
+        self._records.write("[")
+        self._vectors = open(self.vectors_path + ".raw", "wb")
+        self.count = 0
+        self.dim = None
+
+    def add(self, ids: Sequence[str], documents: Sequence[Document], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            self.dim = vectors.shape[1]
+        for doc_id, doc in zip(ids, documents):
+            record = {"id": doc_id, "content": doc.page_content, "metadata": doc.metadata}
+            self._records.write(("," if self.count else "") +
+                                json.dumps(record, default=lambda o: o.item() if hasattr(o, "item") else str(o)))
+            self.count += 1
+        self._vectors.write(vectors.tobytes())
+
+    def carry(self, ids: Sequence[str], documents: Sequence[Document]):
+        """Add documents with the embeddings stored for their ids in the previous files."""
+        rows = [self.previous_rows[doc_id] for doc_id in ids]
+        self.add(ids, documents, self._previous_vectors[rows] if rows else [])
+
+    def abort(self):
+        """Discard what was written and keep the previous files."""
+        self._records.close()
+        self._vectors.close()
+        os.remove(self.records_path + ".tmp")
+        os.remove(self.vectors_path + ".raw")
+        self._previous_vectors = None
+
+    def close(self):
+        self._records.write("]")
+        self._records.close()
+        self._vectors.close()
+        finish_npy(self.vectors_path + ".raw", self.vectors_path + ".tmp", self.count, self.dim)
+        self._previous_vectors = None
+        os.replace(self.records_path + ".tmp", self.records_path)
+        os.replace(self.vectors_path + ".tmp", self.vectors_path)
+
+
+def save_adjacency(ids: Sequence[str], documents: Sequence[Document], vectors, collection_name: str,
+                   index_dir: str = "data"):
+    """Persist the inserted documents with their AstraDB ids and embeddings for in-memory edge expansion."""
+    writer = AdjacencyWriter(collection_name, index_dir)
+    writer.add(ids, documents, vectors)
+    writer.close()
+
+
+def _key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def metadata_matches(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate an AstraDB-style metadata filter ($and/$or, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte) in memory."""
+    if not filter:
+        return True
+    for field, condition in filter.items():
+        if field == "$and":
+            if not all(metadata_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if field == "$or":
+            if not any(metadata_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(field)
+        ops = condition if isinstance(condition, dict) and any(k.startswith("$") for k in condition) \
+            else {"$eq": condition}
+        for op, operand in ops.items():
+            if not _compare(op, value, operand):
+                return False
+    return True
+
+
+def _compare(op: str, value: Any, operand: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not any(v in operand for v in values)
+    if value is None:
+        return False
+    try:
+        return {"$gt": value > operand, "$gte": value >= operand, "$lt": value < operand, "$lte": value <= operand}[op]
+    except TypeError:
+        return False
+
+
+class AdjacencyIndex:
+    """Documents with embeddings, keyed by id and by (incoming field, value) for every edge."""
+
+    def __init__(self, records: Sequence[dict], vectors: np.ndarray, incoming_fields: Iterable[str]):
+        self.contents: Dict[str, Content] = {}
+        self.incoming: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for record, vector in zip(records, vectors):
+            content = Content(id=record["id"], content=record["content"], embedding=vector.tolist(),
+                              metadata=record["metadata"])
+            self.contents[content.id] = content
+            for field in incoming_fields:
+                value = content.metadata.get(field)
+                for item in (value if isinstance(value, list) else [value]):
+                    if item is not None:
+                        self.incoming[(field, _key(item))].append(content.id)
+
+    @classmethod
+    def load(cls, collection_name: str, index_dir: str, incoming_fields: Iterable[str]) -> Optional["AdjacencyIndex"]:
+        records_path, vectors_path = adjacency_paths(collection_name, index_dir)
+        if not (os.path.exists(records_path) and os.path.exists(vectors_path)):
+            log.warning("Adjacency index missing; graph traversal will query the store", path=records_path)
+            return None
+        with open(records_path, encoding="utf-8") as f:
+            records = json.load(f)
+        index = cls(records, np.load(vectors_path), incoming_fields)
+        log.info("Adjacency index loaded", path=records_path, documents=len(index.contents), keys=len(index.incoming))
+        return index
+
+    def neighbours(self, edge: MetadataEdge, filter: Optional[Dict[str, Any]]) -> List[Content]:
+        ids = self.incoming.get((edge.incoming_field, _key(edge.value)), [])
+        return [self.contents[i] for i in ids if metadata_matches(self.contents[i].metadata, filter)]
+
+
+class CachedAdjacencyAdapter(Adapter):
+    """
+    Adapter that sends only the seed similarity search to the underlying store and answers
+    neighbour expansion (adjacent) and id lookups from an AdjacencyIndex.
+    """
+
+    def __init__(self, base: Adapter, index: AdjacencyIndex):
+        super().__init__()
+        self.base = base
+        self.index = index
+
+    # ---------- Seed search: delegated ----------
+    def search_with_embedding(self, query, k=4, filter=None, **kwargs):
+        return self.base.search_with_embedding(query, k, filter, **kwargs)
+
+    async def asearch_with_embedding(self, query, k=4, filter=None, **kwargs):
+        return await self.base.asearch_with_embedding(query, k, filter, **kwargs)
+
+    def search(self, embedding, k=4, filter=None, **kwargs):
+        return self.base.search(embedding, k, filter, **kwargs)
+
+    async def asearch(self, embedding, k=4, filter=None, **kwargs):
+        return await self.base.asearch(embedding, k, filter, **kwargs)
+
+    # ---------- Expansion: from memory ----------
+    def _from_memory(self, ids, filter) -> Tuple[List[Content], List[str]]:
+        found = [self.index.contents[i] for i in dict.fromkeys(ids) if i in self.index.contents]
+        missing = [i for i in ids if i not in self.index.contents]
+        return [c for c in found if metadata_matches(c.metadata, filter)], missing
+
+    def get(self, ids, filter=None, **kwargs) -> List[Content]:
+        found, missing = self._from_memory(ids, filter)
+        if missing:
+            return found + list(self.base.get(missing, filter, **kwargs))
+        self._saved(1)
+        return found
+
+    async def aget(self, ids, filter=None, **kwargs) -> List[Content]:
+        found, missing = self._from_memory(ids, filter)
+        if missing:
+            return found + list(await self.base.aget(missing, filter, **kwargs))
+        self._saved(1)
+        return found
+
+    def adjacent(self, edges: set, query_embedding: List[float], k: int, filter, **kwargs) -> Iterable[Content]:
+        results: List[Content] = []
+        ids = []
+        for edge in edges:
+            if isinstance(edge, MetadataEdge):
+                results.extend(self.index.neighbours(edge, filter))
+                self._saved(1)
+            elif isinstance(edge, IdEdge):
+                ids.append(edge.id)
+            else:
+                raise ValueError(f"Unsupported edge: {edge}")
+        if ids:
+            results.extend(self.get(ids, filter))
+        return top_k(results, embedding=query_embedding, k=k)
+
+    async def aadjacent(self, edges: set, query_embedding: List[float], k: int, filter, **kwargs) -> Iterable[Content]:
+        return self.adjacent(edges, query_embedding, k, filter, **kwargs)
+
+    @staticmethod
+    def _saved(count: int):
+        METRICS.incr("adjacency_cache.round_trips_saved", count)
+        counter = _ROUND_TRIPS_SAVED.get()
+        if counter is not None:
+            counter[0] += count
+
+
+class CachedGraphRetriever(GraphRetriever):
+    """GraphRetriever that reports, per query, how many store round trips the adjacency cache saved."""
+
+    def _get_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        token = _ROUND_TRIPS_SAVED.set([0])
+        try:
+            return super()._get_relevant_documents(query, **kwargs)
+        finally:
+            self._report(query, token)
+
+    async def _aget_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        token = _ROUND_TRIPS_SAVED.set([0])
+        try:
+            return await super()._aget_relevant_documents(query, **kwargs)
+        finally:
+            self._report(query, token)
+
+    @staticmethod
+    def _report(query: str, token):
+        saved = _ROUND_TRIPS_SAVED.get()[0]
+        _ROUND_TRIPS_SAVED.reset(token)
+        METRICS.observe("graph_retriever.round_trips_saved", saved)
+        log.info("Graph traversal served from adjacency cache", query=query, round_trips_saved=saved)
@@ -0,0 +1,173 @@
+# retriever/ann_index.py
+import os
+from typing import Callable, Optional
+
+import numpy as np
+
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_ASSIGN_CHUNK_ROWS = 65536
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (max inner product on unit vectors) per row, in chunks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + _ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample_per_list: int = 64,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids trained on a sample of at most n_lists * sample_per_list rows."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    # Rows may be stored scaled (int8); only their direction matters
+    sample /= np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-12)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_lists)
+        empty = counts == 0
+        # Re-seed empty lists with random sample points
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1.0, norms)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index with k-means coarse quantization over unit-normalized vectors.
+
+    Every row is assigned to its nearest of n_lists centroids; a search scores only the rows in the
+    nprobe lists closest to the query (nprobe is the recall/latency knob). Rows per list are kept in
+    CSR form (list_rows, list_offsets). All arrays are saved as .npy and memory-mapped on load.
+    The index never touches the vectors itself; callers pass a score_rows(rows) -> scores function.
+    """
+
+    FILES = ("centroids", "assignments", "list_rows", "list_offsets")
+    merge_fraction = 0.1
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, nprobe: int = 8, trained_rows: int = 0):
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self.trained_rows = trained_rows or len(assignments)
+        self._set_assignments(assignments)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: Optional[int] = None, nprobe: int = 8) -> "IVFIndex":
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        centroids = spherical_kmeans(vectors, n_lists)
+        index = cls(centroids, _assign(vectors, centroids), nprobe, trained_rows=len(vectors))
+        log.info("IVF index built", rows=len(vectors), lists=n_lists, nprobe=nprobe)
+        return index
+
+    def _set_assignments(self, assignments: np.ndarray):
+        self.assignments = assignments
+        self.list_rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._reset_pending()
+
+    def _reset_pending(self):
+        # Labels of appended rows, in a buffer grown by doubling; the first _pending_count are in use
+        self._pending = np.empty(0, dtype=np.int32)
+        self._pending_count = 0
+
+    @property
+    def _pending_labels(self) -> np.ndarray:
+        return self._pending[:self._pending_count]
+
+    @property
+    def size(self) -> int:
+        """Rows indexed, including appended rows not yet merged into the sorted lists."""
+        return len(self.assignments) + len(self._pending_labels)
+
+    def _merge_pending(self):
+        """Fold appended rows into the CSR lists (one argsort over the corpus)."""
+        if len(self._pending_labels):
+            self._set_assignments(np.concatenate([np.asarray(self.assignments), self._pending_labels]))
+
+    # ---------- Maintenance ----------
+    def add(self, vectors: np.ndarray):
+        """
+        Append rows (already at the end of the caller's matrix) to their nearest lists.
+        They are kept as a pending tail that searches scan alongside the lists; the lists are only
+        re-sorted once the tail reaches merge_fraction of the index, so inserts cost O(batch).
+        """
+        labels = _assign(vectors, self.centroids)
+        needed = self._pending_count + len(labels)
+        if needed > len(self._pending):
+            grown = np.empty(max(needed, 2 * len(self._pending)), dtype=np.int32)
+            grown[:self._pending_count] = self._pending_labels
+            self._pending = grown
+        self._pending[self._pending_count:needed] = labels
+        self._pending_count = needed
+        if self._pending_count > max(1024, self.merge_fraction * len(self.assignments)):
+            self._merge_pending()
+
+    def keep(self, rows):
+        """Drop every row not in rows (ascending), renumbering the survivors as the caller did."""
+        self._merge_pending()
+        self._set_assignments(np.asarray(self.assignments)[rows])
+
+    def needs_retrain(self, growth: float = 4.0) -> bool:
+        """Centroids drift from the data as it grows; retrain once it has grown by `growth`x."""
+        return self.size > growth * self.trained_rows
+
+    # ---------- Persistence ----------
+    def save(self, directory: str, prefix: str = "ivf"):
+        self._merge_pending()
+        for name in self.FILES:
+            path = os.path.join(directory, f"{prefix}_{name}.tmp.npy")
+            np.save(path, np.asarray(getattr(self, name)))
+        np.save(os.path.join(directory, f"{prefix}_trained_rows.tmp.npy"), np.asarray([self.trained_rows]))
+        for name in self.FILES + ("trained_rows",):
+            os.replace(os.path.join(directory, f"{prefix}_{name}.tmp.npy"),
+                       os.path.join(directory, f"{prefix}_{name}.npy"))
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int = 8, prefix: str = "ivf") -> Optional["IVFIndex"]:
+        paths = {name: os.path.join(directory, f"{prefix}_{name}.npy") for name in cls.FILES + ("trained_rows",)}
+        if not all(os.path.exists(p) for p in paths.values()):
+            return None
+        index = cls.__new__(cls)
+        index.nprobe = nprobe
+        index.trained_rows = int(np.load(paths["trained_rows"])[0])
+        for name in cls.FILES:
+            setattr(index, name, np.load(paths[name], mmap_mode="r"))
+        index._reset_pending()
+        return index
+
+    # ---------- Search ----------
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the nprobe lists nearest the query, ascending (sequential reads on a mapped matrix)."""
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        scores = self.centroids @ query
+        probes = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        rows = [self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes]
+        if len(self._pending_labels):
+            tail = np.flatnonzero(np.isin(self._pending_labels, probes)) + len(self.assignments)
+            rows.append(tail.astype(np.int64))
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+    def search(self, query: np.ndarray, k: int, score_rows: Callable[[np.ndarray], np.ndarray],
+               nprobe: Optional[int] = None, allowed: Optional[np.ndarray] = None):
+        """(rows, scores) of the approximate top-k; allowed is an optional boolean mask over rows."""
+        rows = self.candidates(query, nprobe)
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+        scores = score_rows(rows)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores)
+        return rows[order], scores[order]
@@ -0,0 +1,175 @@
+# retriever/compression.py
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from langchain_core.embeddings import Embeddings
+from langchain.retrievers.document_compressors import LLMChainExtractor
+
+from prod_assistant.utils.text import REVIEW_BOILERPLATE, STOPWORDS, tokenize
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _approx_tokens(text: str) -> int:
+    return len(text.split())
+
+
+class ExtractiveCompressor(BaseDocumentCompressor):
+    """
+    Local extractive compressor: no model calls on the lexical path.
+
+    Each document is split into a header (product fields) and review spans. Reviews are split on "||",
+    long reviews further into sentences. Spans are scored against the query (BM25 over the candidate
+    spans, or cosine similarity of embeddings) and the best ones are kept, in their original order,
+    until max_tokens_per_doc is reached. The header is always kept so price and rating survive.
+    """
+
+    scorer: str = "lexical"
+    """"lexical" or "embedding"."""
+    embeddings: Optional[Embeddings] = None
+    """Required when scorer is "embedding"."""
+    max_tokens_per_doc: int = 200
+    max_span_tokens: int = 60
+    """Reviews longer than this are split into sentences before scoring."""
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        split_docs = [self._split(doc) for doc in documents]
+        spans = [span for _, doc_spans in split_docs for span in doc_spans]
+        if self.scorer == "embedding":
+            scores = self._embedding_scores(query, spans, self.embeddings.embed_query(query),
+                                            self.embeddings.embed_documents(spans) if spans else [])
+        else:
+            scores = self._lexical_scores(query, spans)
+        return self._assemble(documents, split_docs, scores)
+
+    async def acompress_documents(self, documents: Sequence[Document], query: str,
+                                  callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        if self.scorer != "embedding":
+            return self.compress_documents(documents, query, callbacks)
+        split_docs = [self._split(doc) for doc in documents]
+        spans = [span for _, doc_spans in split_docs for span in doc_spans]
+        scores = self._embedding_scores(query, spans, await self.embeddings.aembed_query(query),
+                                        await self.embeddings.aembed_documents(spans) if spans else [])
+        return self._assemble(documents, split_docs, scores)
+
+    # ---------- Splitting ----------
+    def _split(self, doc: Document) -> Tuple[str, List[str]]:
+        header, sep, reviews = doc.page_content.partition("top_reviews:")
+        if not sep:
+            header, reviews = "", doc.page_content
+        spans = []
+        for review in reviews.split("||"):
+            review = REVIEW_BOILERPLATE.sub("", review).strip()
+            if not review:
+                continue
+            if _approx_tokens(review) > self.max_span_tokens:
+                spans.extend(s for s in _SENTENCE_SPLIT.split(review) if s.strip())
+            else:
+                spans.append(review)
+        return header.rstrip(", "), spans
+
+    # ---------- Scoring ----------
+    @staticmethod
+    def _lexical_scores(query: str, spans: List[str], k1: float = 1.2, b: float = 0.75) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t not in STOPWORDS]
+        if not spans or not terms:
+            return [0.0] * len(spans)
+        span_terms = [Counter(tokenize(span)) for span in spans]
+        lengths = [sum(c.values()) for c in span_terms]
+        avg_len = (sum(lengths) / len(lengths)) or 1.0
+        n = len(spans)
+        scores = []
+        for counts, length in zip(span_terms, lengths):
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term, 0)
+                if not tf:
+                    continue
+                df = sum(1 for c in span_terms if term in c)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _embedding_scores(query: str, spans: List[str], query_vector, span_vectors) -> List[float]:
+        if not spans:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        m = np.asarray(span_vectors, dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1) * (np.linalg.norm(q) or 1.0)
+        return ((m @ q) / np.where(norms == 0, 1.0, norms)).tolist()
+
+    # ---------- Assembly ----------
+    def _assemble(self, documents: Sequence[Document], split_docs, scores: List[float]) -> List[Document]:
+        compressed = []
+        offset = 0
+        for doc, (header, spans) in zip(documents, split_docs):
+            doc_scores = scores[offset:offset + len(spans)]
+            offset += len(spans)
+            budget = self.max_tokens_per_doc - _approx_tokens(header)
+            keep = set()
+            for idx in sorted(range(len(spans)), key=lambda i: -doc_scores[i]):
+                cost = _approx_tokens(spans[idx])
+                if cost <= budget:
+                    keep.add(idx)
+                    budget -= cost
+            kept_spans = [spans[i] for i in sorted(keep)]
+            content = header + (",top_reviews:" + " || ".join(kept_spans) if kept_spans else "")
+            compressed.append(Document(page_content=content, metadata=doc.metadata))
+        return compressed
+
+
+class ConcurrentLLMChainExtractor(LLMChainExtractor):
+    """LLMChainExtractor whose per-document LLM calls run concurrently (bounded by max_concurrency)."""
+
+    max_concurrency: int = 8
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        inputs = [self.get_input(query, doc) for doc in documents]
+        outputs = self.llm_chain.batch(inputs, {"callbacks": callbacks, "max_concurrency": self.max_concurrency})
+        return [Document(page_content=output, metadata=doc.metadata)
+                for doc, output in zip(documents, outputs) if len(output) > 0]
+
+    async def acompress_documents(self, documents: Sequence[Document], query: str,
+                                  callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        inputs = [self.get_input(query, doc) for doc in documents]
+        outputs = await self.llm_chain.abatch(inputs, {"callbacks": callbacks, "max_concurrency": self.max_concurrency})
+        return [Document(page_content=output, metadata=doc.metadata)
+                for doc, output in zip(documents, outputs) if len(output) > 0]
+
+
+def build_compressor(settings: dict, model_loader) -> Optional[BaseDocumentCompressor]:
+    """
+    Build the compression stage from the `retriever.compression` block in config.yaml.
+    mode: "extractive" (default), "llm" or "none"; returns None for "none".
+    """
+    mode = settings.get("mode", "extractive")
+    if mode == "none":
+        compressor = None
+    elif mode == "llm":
+        compressor = ConcurrentLLMChainExtractor.from_llm(model_loader.load_llm())
+        compressor.max_concurrency = settings.get("llm_max_concurrency", 8)
+    elif mode == "extractive":
+        scorer = settings.get("scorer", "lexical")
+        compressor = ExtractiveCompressor(
+            scorer=scorer,
+            embeddings=model_loader.load_embeddings() if scorer == "embedding" else None,
+            max_tokens_per_doc=settings.get("max_tokens_per_doc", 200),
+            max_span_tokens=settings.get("max_span_tokens", 60),
+        )
+    else:
+        raise ValueError(f"Unknown retriever compression mode: {mode}")
+    log.info("Retriever compression configured", mode=mode)
+    return compressor
@@ -0,0 +1,230 @@
+# retriever/constraints.py
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from prod_assistant.utils.metrics import METRICS
+
+# Numeric metadata written by DataIngestion next to the raw scraped strings
+NUMERIC_FIELDS = {"price": "price_value", "rating": "rating_value", "reviews": "total_reviews_value"}
+
+_UPPER = r"under|below|less than|cheaper than|within|up ?to|at most|max(?:imum)?|<=?"
+_LOWER = r"above|over|more than|greater than|at least|min(?:imum)?|>=?"
+_AMOUNT = r"(?:rs\.?|inr|₹)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k|lakhs?)?\b"
+_RATING_BOUND = re.compile(rf"(?:rated|rating)\s*(?:of\s*)?({_UPPER}|{_LOWER})\s*(\d(?:\.\d+)?)(?![\d.])")
+# "rated 4.5 and above", "rating 4 or more", "rated 3 and below"
+_RATING_TRAILING = re.compile(
+    r"(?:rated|rating)\s*(?:of\s*)?(\d(?:\.\d+)?)(?![\d.])\s*(?:and|&|or)\s*(above|up|more|higher|below|less|lower)")
+_RATING_STARS = re.compile(
+    rf"(?:({_UPPER}|{_LOWER})\s*)?(?<![\d.])(\d(?:\.\d+)?)\s*(\+)?\s*(?:stars?|rated|rating)"
+    r"(?:\s*(?:and|&)\s*(above|up|more))?"
+)
+_REVIEWS_BOUND = re.compile(rf"({_UPPER}|{_LOWER})\s*{_AMOUNT}\s*(?:reviews|ratings)")
+_PRICE_BETWEEN = re.compile(rf"between\s*{_AMOUNT}\s*(?:and|to|-)\s*{_AMOUNT}")
+# "256 GB", "5000 mAh", "6.1 inch" are specs, not prices
+_PRICE_BOUND = re.compile(rf"({_UPPER}|{_LOWER})\s*{_AMOUNT}(?!\s*(?:gb|tb|mb|mah|mp|hz|w|watts?|inch(?:es)?|cm|mm)\b)")
+# "max"/"min" are also model names ("iPhone 16 Pro Max 256"); as a price bound they need a currency,
+# a k/lakh suffix or a four-figure amount after them
+_MODEL_WORD = re.compile(r"max(?:imum)?|min(?:imum)?")
+_CURRENCY = re.compile(r"rs\.?|inr|₹")
+
+
+def to_number(value: Any) -> Optional[float]:
+    """Parse scraped values such as "₹1,34,999", "3,606" or 4.6 into a float (None if unparsable)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.number)):
+        return None if math.isnan(float(value)) else float(value)
+    cleaned = re.sub(r"[^\d.]", "", str(value))
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _amount(digits: str, suffix: Optional[str]) -> float:
+    value = float(digits.replace(",", ""))
+    if suffix == "k":
+        value *= 1_000
+    elif suffix:
+        value *= 100_000
+    return value
+
+
+@dataclass
+class QueryConstraints:
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_rating: Optional[float] = None
+    max_rating: Optional[float] = None
+    min_reviews: Optional[float] = None
+    max_reviews: Optional[float] = None
+
+    def bounds(self) -> Dict[str, tuple]:
+        """{metadata field: (low, high)} for every constrained field."""
+        pairs = {
+            NUMERIC_FIELDS["price"]: (self.min_price, self.max_price),
+            NUMERIC_FIELDS["rating"]: (self.min_rating, self.max_rating),
+            NUMERIC_FIELDS["reviews"]: (self.min_reviews, self.max_reviews),
+        }
+        return {field: bound for field, bound in pairs.items() if bound != (None, None)}
+
+    def is_empty(self) -> bool:
+        return not self.bounds()
+
+    def matches(self, metadata: dict) -> bool:
+        for field, (low, high) in self.bounds().items():
+            value = to_number(metadata.get(field))
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    def to_filter(self) -> Dict[str, Any]:
+        """AstraDB Data API metadata filter."""
+        clauses = []
+        for field, (low, high) in self.bounds().items():
+            if low is not None:
+                clauses.append({field: {"$gte": low}})
+            if high is not None:
+                clauses.append({field: {"$lte": high}})
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _set_rating(constraints: QueryConstraints, op: Optional[str], value: float, open_ended: bool) -> bool:
+    if value > 5:
+        return False
+    if op and re.fullmatch(_UPPER, op):
+        constraints.max_rating = value
+    elif op or open_ended:
+        constraints.min_rating = value
+    else:
+        return False
+    return True
+
+
+def parse_constraints(query: str) -> QueryConstraints:
+    """
+    Extract price, rating and review-count bounds, e.g. "phones under 30k rated above 4.5".
+    Rating phrases are matched first and cut out so their numbers are not read as prices.
+    """
+    text = query.lower()
+    constraints = QueryConstraints()
+
+    text = _RATING_BOUND.sub(
+        lambda m: " " if _set_rating(constraints, m.group(1), float(m.group(2)), False) else m.group(0), text)
+    text = _RATING_TRAILING.sub(
+        lambda m: " " if _set_rating(constraints, "under" if m.group(2) in ("below", "less", "lower") else None,
+                                     float(m.group(1)), True) else m.group(0), text)
+    text = _RATING_STARS.sub(
+        lambda m: " " if _set_rating(constraints, m.group(1), float(m.group(2)), bool(m.group(3) or m.group(4)))
+        else m.group(0), text)
+
+    for match in _REVIEWS_BOUND.finditer(text):
+        value = _amount(match.group(2), match.group(3))
+        if re.fullmatch(_UPPER, match.group(1)):
+            constraints.max_reviews = value
+        else:
+            constraints.min_reviews = value
+    text = _REVIEWS_BOUND.sub(" ", text)
+
+    between = _PRICE_BETWEEN.search(text)
+    if between:
+        low, high = _amount(between.group(1), between.group(2)), _amount(between.group(3), between.group(4))
+        constraints.min_price, constraints.max_price = min(low, high), max(low, high)
+        text = text.replace(between.group(0), " ")
+
+    for match in _PRICE_BOUND.finditer(text):
+        value = _amount(match.group(2), match.group(3))
+        if value < 100:  # "over 2 years", "under 5 inches"
+            continue
+        if _MODEL_WORD.fullmatch(match.group(1)) and not (
+                _CURRENCY.search(match.group(0)) or match.group(3) or value >= 1000):
+            continue
+        if re.fullmatch(_UPPER, match.group(1)):
+            constraints.max_price = value
+        else:
+            constraints.min_price = value
+    return constraints
+
+
+class NumericIndex:
+    """Per-field sorted arrays over the snapshot documents; a range lookup is two binary searches."""
+
+    def __init__(self, documents: Sequence[Document]):
+        self.documents = list(documents)
+        self._sorted: Dict[str, tuple] = {}
+        for field in NUMERIC_FIELDS.values():
+            values = np.array([to_number((d.metadata or {}).get(field)) for d in self.documents], dtype=np.float64)
+            present = np.flatnonzero(~np.isnan(values))
+            order = present[np.argsort(values[present], kind="stable")]
+            self._sorted[field] = (values[order], order)
+
+    def lookup(self, constraints: QueryConstraints) -> np.ndarray:
+        """Positions (into documents) of every document satisfying all bounds."""
+        result = None
+        for field, (low, high) in constraints.bounds().items():
+            values, order = self._sorted[field]
+            start = 0 if low is None else np.searchsorted(values, low, side="left")
+            end = len(values) if high is None else np.searchsorted(values, high, side="right")
+            positions = np.sort(order[start:end])
+            result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+        return np.arange(len(self.documents)) if result is None else result
+
+
+class ConstrainedRetriever(BaseRetriever):
+    """
+    Applies price/rating/review bounds parsed from the query.
+    When few enough snapshot documents qualify they are returned straight from the NumericIndex;
+    otherwise the bounds are pushed down to the vector store as a metadata filter (pushdown=True,
+    AstraDB) and the results are post-filtered.
+    """
+
+    base: BaseRetriever
+    numeric_index: Optional[NumericIndex] = None
+    k: int = 8
+    pushdown: bool = True
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _from_index(self, constraints: QueryConstraints) -> Optional[List[Document]]:
+        if self.numeric_index is None:
+            return None
+        positions = self.numeric_index.lookup(constraints)
+        # Nothing qualifying in the snapshot (or a misread bound): let the vector path decide
+        if len(positions) == 0 or len(positions) > self.k:
+            return None
+        METRICS.incr("constrained_retriever.index_hits")
+        docs = [self.numeric_index.documents[i] for i in positions]
+        rating = NUMERIC_FIELDS["rating"]
+        return sorted(docs, key=lambda d: -(to_number(d.metadata.get(rating)) or 0.0))
+
+    def _search_kwargs(self, constraints: QueryConstraints) -> dict:
+        METRICS.incr("constrained_retriever.pushdowns" if self.pushdown else "constrained_retriever.post_filters")
+        return {"filter": constraints.to_filter()} if self.pushdown else {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        constraints = parse_constraints(query)
+        if constraints.is_empty():
+            return self.base.invoke(query, {"callbacks": run_manager.get_child()})
+        docs = self._from_index(constraints)
+        if docs is not None:
+            return docs
+        docs = self.base.invoke(query, {"callbacks": run_manager.get_child()}, **self._search_kwargs(constraints))
+        return [d for d in docs if constraints.matches(d.metadata)]
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        constraints = parse_constraints(query)
+        if constraints.is_empty():
+            return await self.base.ainvoke(query, {"callbacks": run_manager.get_child()})
+        docs = self._from_index(constraints)
+        if docs is not None:
+            return docs
+        docs = await self.base.ainvoke(query, {"callbacks": run_manager.get_child()}, **self._search_kwargs(constraints))
+        return [d for d in docs if constraints.matches(d.metadata)]
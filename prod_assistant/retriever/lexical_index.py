@@ -0,0 +1,190 @@
+# retriever/lexical_index.py
+import json
+import os
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from prod_assistant.retriever.constraints import NumericIndex, parse_constraints
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text import QUERY_STOPWORDS, tokenize
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+def documents_path(collection_name: str, index_dir: str = "data") -> str:
+    if not os.path.isabs(index_dir):
+        index_dir = os.path.join(os.getcwd(), index_dir)
+    return os.path.join(index_dir, f"{collection_name}.documents.jsonl")
+
+
+def save_documents(documents: Sequence[Document], path: str, append: bool = False):
+    """Snapshot the ingested documents so serving processes can build the lexical index without AstraDB.
+    With append, the batch is added to an existing snapshot (streaming ingestion).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for doc in documents:
+            record = {"page_content": doc.page_content, "metadata": doc.metadata}
+            # pandas rows carry numpy scalars
+            f.write(json.dumps(record, default=lambda o: o.item() if hasattr(o, "item") else str(o)) + "\n")
+
+
+def load_documents(path: str) -> List[Document]:
+    with open(path, encoding="utf-8") as f:
+        return [Document(**json.loads(line)) for line in f if line.strip()]
+
+
+class BM25Index:
+    """
+    In-memory inverted index over product titles and review text, scored with BM25.
+    Title tokens are counted title_boost times so model names outrank passing mentions in reviews.
+    """
+
+    def __init__(self, documents: Sequence[Document], k1: float = 1.2, b: float = 0.75, title_boost: int = 3):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._title_tokens: List[set] = []
+        self._ids: Dict[str, int] = {}
+        lengths = []
+        for idx, doc in enumerate(self.documents):
+            meta = doc.metadata or {}
+            title_tokens = tokenize(meta.get("product_title", ""))
+            self._title_tokens.append(set(title_tokens))
+            if meta.get("product_id"):
+                self._ids[str(meta["product_id"]).lower()] = idx
+            counts = Counter(tokenize(doc.page_content))
+            for token in title_tokens:
+                counts[token] += title_boost - 1  # the title already appears once in page_content
+            for token, tf in counts.items():
+                postings[token][idx] = tf
+            lengths.append(sum(counts.values()))
+
+        self._lengths = np.asarray(lengths, dtype=np.float32)
+        self._avg_length = float(self._lengths.mean()) if lengths else 1.0
+        n = len(self.documents)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for token, docs in postings.items():
+            idx = np.fromiter(docs.keys(), dtype=np.int64, count=len(docs))
+            tf = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            idf = float(np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)))
+            self._postings[token] = (idx, tf, idf)
+
+    def search(self, query: str, k: int = 20, candidates: Optional[np.ndarray] = None) -> List[Tuple[Document, float]]:
+        """
+        Top-k documents by BM25; only postings of the query terms are touched.
+        candidates restricts the result to those document positions (e.g. from NumericIndex.lookup).
+        """
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            idx, tf, idf = posting
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[idx] / self._avg_length)
+            scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if candidates is not None:
+            mask = np.zeros(len(self.documents), dtype=bool)
+            mask[candidates] = True
+            scores[~mask] = 0.0
+        hits = np.flatnonzero(scores)
+        top = hits[np.argsort(-scores[hits])][:k]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def exact_match(self, query: str, max_results: int) -> Optional[List[Document]]:
+        """
+        Documents the query names outright, or None.
+        Fires for a product id in the query, or when every significant query token (at least one of
+        them containing a digit, e.g. "iphone 16 pro max 256 gb") appears in at most max_results titles.
+        """
+        tokens = [t for t in tokenize(query) if t not in QUERY_STOPWORDS]
+        by_id = [self._ids[t] for t in tokens if t in self._ids]
+        if by_id:
+            return [self.documents[i] for i in dict.fromkeys(by_id)]
+        if not tokens or not any(ch.isdigit() for t in tokens for ch in t):
+            return None
+        wanted = set(tokens)
+        matches = [i for i, title in enumerate(self._title_tokens) if wanted <= title]
+        if not matches or len(matches) > max_results:
+            return None
+        ranked = {id(doc): rank for rank, (doc, _) in enumerate(self.search(query, k=len(self.documents)))}
+        return sorted((self.documents[i] for i in matches), key=lambda d: ranked.get(id(d), len(ranked)))
+
+
+def _doc_key(doc: Document) -> str:
+    meta = doc.metadata or {}
+    return str(meta.get("product_id") or doc.id or doc.page_content[:200])
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[Sequence[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """Fuse ranked lists by sum(1 / (rrf_k + rank)); documents are matched on product_id."""
+    scores: Dict[str, float] = defaultdict(float)
+    first_seen: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank)
+            first_seen.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [first_seen[key] for key in ranked]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Vector retriever fused with the BM25 index via reciprocal rank fusion.
+    Queries that name a product outright (see BM25Index.exact_match) are answered from the index
+    without calling the vector store.
+    """
+
+    vector_retriever: BaseRetriever
+    index: BM25Index
+    numeric_index: Optional[NumericIndex] = None
+    """Restricts the lexical side to documents meeting the query's price/rating bounds."""
+    k: int = 8
+    lexical_k: int = 20
+    rrf_k: int = 60
+    exact_match: bool = True
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _exact(self, query: str) -> Optional[List[Document]]:
+        if not self.exact_match:
+            return None
+        docs = self.index.exact_match(query, self.k)
+        if docs:
+            constraints = parse_constraints(query)
+            docs = [doc for doc in docs if constraints.matches(doc.metadata)]
+        if docs:
+            METRICS.incr("hybrid_retriever.exact_hits")
+        return docs or None
+
+    def _fuse(self, query: str, vector_docs: List[Document]) -> List[Document]:
+        candidates = None
+        constraints = parse_constraints(query)
+        if self.numeric_index is not None and not constraints.is_empty():
+            # Empty when nothing meets the bounds; the lexical side then contributes nothing
+            candidates = self.numeric_index.lookup(constraints)
+        lexical_docs = [doc for doc, _ in self.index.search(query, self.lexical_k, candidates)
+                        if candidates is not None or constraints.matches(doc.metadata)]
+        METRICS.incr("hybrid_retriever.fused")
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], self.k, self.rrf_k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        exact = self._exact(query)
+        if exact:
+            return exact
+        vector_docs = self.vector_retriever.invoke(query, {"callbacks": run_manager.get_child()})
+        return self._fuse(query, vector_docs)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        exact = self._exact(query)
+        if exact:
+            return exact
+        vector_docs = await self.vector_retriever.ainvoke(query, {"callbacks": run_manager.get_child()})
+        return self._fuse(query, vector_docs)
@@ -0,0 +1,495 @@
+# retriever/local_vector_store.py
+import json
+import os
+import struct
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_graph_retriever._conversion import METADATA_EMBEDDING_KEY
+from langchain_graph_retriever.adapters.langchain import LangchainAdapter
+
+from prod_assistant.retriever.adjacency import metadata_matches
+from prod_assistant.retriever.ann_index import IVFIndex
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+def _json_default(o):
+    # pandas rows carry numpy scalars
+    return o.item() if hasattr(o, "item") else str(o)
+
+_SEARCH_CHUNK_ROWS = 65536
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# .npy headers written here are padded to this size so appends can rewrite the shape in place
+_HEADER_BYTES = 256
+
+
+def _npy_header(dtype, shape, size: int = _HEADER_BYTES) -> bytes:
+    """A version 1.0 .npy header padded to exactly size bytes."""
+    text = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False,
+                 "shape": tuple(int(n) for n in shape)})
+    room = size - 11  # magic, version, header length, trailing newline
+    if len(text) > room:
+        raise ValueError(f"Shape {shape} does not fit a {size}-byte .npy header")
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", size - 10) + (text.ljust(room) + "\n").encode("latin1")
+
+
+def _append_npy(path: str, array: np.ndarray):
+    """Append rows to an .npy file written with _npy_header: data first, then the new shape."""
+    array = np.ascontiguousarray(array)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(_npy_header(array.dtype, array.shape))
+            f.write(array.tobytes())
+        return
+    with open(path, "r+b") as f:
+        np.lib.format.read_magic(f)
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+        if dtype != array.dtype or tuple(shape[1:]) != array.shape[1:]:
+            raise ValueError(f"Cannot append {array.dtype} rows of shape {array.shape[1:]} to {path}")
+        f.seek(offset + shape[0] * int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize)
+        f.write(array.tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(_npy_header(dtype, (shape[0] + len(array),) + tuple(shape[1:]), offset))
+
+
+def _column_part(metadatas: Iterable[dict], field: str, kind: str, count: int):
+    """One cached metadata column: raw values (object array), numbers (float, NaN if not a
+    number) or whether any value is a list."""
+    values = (metadata.get(field) for metadata in metadatas)
+    if kind == "raw":
+        return np.fromiter(values, dtype=object, count=count)
+    if kind == "num":
+        return np.fromiter((v if isinstance(v, (int, float)) else np.nan for v in values), dtype=np.float64,
+                           count=count)
+    return any(isinstance(v, list) for v in values)
+
+
+class _View(NamedTuple):
+    """Consistent snapshot of the store for one search: rows [0, rows) of these objects."""
+    records: List[dict]
+    rows: int
+    vectors: Optional[np.ndarray]
+    scales: Optional[np.ndarray]
+    alive: Optional[np.ndarray]
+    row_by_id: Dict[str, int]
+    columns: Dict[tuple, Any]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store persisted under one directory:
+
+    - vectors.npy: unit-normalized embeddings, memory-mapped for search. Stored as float32, float16,
+      or int8 with a per-row scale in scales.npy.
+    - records.jsonl: id, text and metadata per row (the metadata sidecar), kept in memory.
+
+    Inserts append to the files (the .npy headers are rewritten in place), so a batch costs the
+    same however large the collection is. Re-adding an id appends a new row and leaves the old one
+    dead (on load the last record for an id wins); delete() and compact() rewrite the files
+    without dead rows.
+
+    Cosine top-k is a chunked matrix-vector product over the mapped matrix. Filters use the same
+    AstraDB-style syntax as the AstraDB backend ($and, $gte, $lte, ...) and are evaluated as numpy
+    masks over per-field metadata columns, built on first use and extended on insert.
+    """
+
+    def __init__(self, embedding: Embeddings, path: str, dtype: str = "float32", ann: Optional[dict] = None):
+        """ann: `vector_store.local.ann` settings; when enabled, collections of at least min_rows rows
+        are searched through an IVFIndex kept in the same directory and updated on every insert.
+        """
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported local vector store dtype: {dtype}")
+        self.embedding = embedding
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._records: List[dict] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive: Optional[np.ndarray] = None  # None when every row is live
+        self._columns: Dict[tuple, Any] = {}
+        self.ann_settings = ann or {}
+        self._ann: Optional[IVFIndex] = None
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        if self.ann_settings.get("enabled", False):
+            self._ann = IVFIndex.load(path, nprobe=self.ann_settings.get("nprobe", 8))
+            if self._ann is not None and self._ann.size < len(self._records):
+                # Rows appended since the index was last saved
+                self._ann.add(self._decoded(np.arange(self._ann.size, len(self._records))))
+            elif self._ann is not None and self._ann.size > len(self._records):
+                self._ann = None
+            if self._ann is None:
+                self._sync_ann(None, None)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    # ---------- Persistence ----------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        self._records, self._row_by_id, self._alive, self._columns = [], {}, None, {}
+        self._vectors = self._scales = None
+        if not os.path.exists(self._file("records.jsonl")) or not os.path.exists(self._file("vectors.npy")):
+            return
+        with open(self._file("records.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._records.append(json.loads(line))
+                except ValueError:
+                    break  # partial line from an interrupted append
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+        if self._vectors.dtype != _DTYPES[self.dtype]:
+            raise ValueError(f"{self.path} holds {self._vectors.dtype} vectors but config asks for {self.dtype}")
+        if self.dtype == "int8":
+            self._scales = np.load(self._file("scales.npy"), mmap_mode="r")
+        rows = min(len(self._records), len(self._vectors), len(self._scales) if self._scales is not None else
+                   len(self._vectors))
+        alive = np.ones(rows, dtype=bool)
+        for row, record in enumerate(self._records[:rows]):
+            previous = self._row_by_id.get(record["id"])
+            if previous is not None:
+                alive[previous] = False
+            self._row_by_id[record["id"]] = row
+        self._alive = None if alive.all() else alive
+        log.info("Local vector store opened", path=self.path, rows=rows, dtype=self.dtype)
+        if rows != len(self._records) or rows != len(self._vectors) or self._vectors.offset != _HEADER_BYTES:
+            # An interrupted append left the files out of step, or they predate appendable headers
+            self._records = self._records[:rows]
+            self._rewrite(np.arange(rows))
+
+    def _rewrite(self, rows: np.ndarray):
+        """Rewrite the store with only the given rows (ascending), atomically (new files, then rename)."""
+        dim = self._vectors.shape[1]
+        with open(self._file("vectors.tmp.npy"), "wb") as f:
+            f.write(_npy_header(self._vectors.dtype, (len(rows), dim)))
+            for start in range(0, len(rows), _SEARCH_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(self._vectors[rows[start:start + _SEARCH_CHUNK_ROWS]]).tobytes())
+        if self._scales is not None:
+            with open(self._file("scales.tmp.npy"), "wb") as f:
+                f.write(_npy_header(np.float32, (len(rows),)))
+                f.write(np.ascontiguousarray(self._scales[rows], dtype=np.float32).tobytes())
+        with open(self._file("records.tmp.jsonl"), "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(self._records[row], default=_json_default) + "\n")
+        os.replace(self._file("vectors.tmp.npy"), self._file("vectors.npy"))
+        if self._scales is not None:
+            os.replace(self._file("scales.tmp.npy"), self._file("scales.npy"))
+        os.replace(self._file("records.tmp.jsonl"), self._file("records.jsonl"))
+        log.info("Local vector store compacted", path=self.path, rows=len(rows))
+        self._load()
+
+    def _append(self, records: List[dict], vectors: np.ndarray):
+        """Append rows to the files (vectors, scales, then records) and to the in-memory state."""
+        stored, scales = self._encode(vectors)
+        _append_npy(self._file("vectors.npy"), stored)
+        if scales is not None:
+            _append_npy(self._file("scales.npy"), scales)
+        with open(self._file("records.jsonl"), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=_json_default) + "\n")
+
+        start = len(self._records)
+        alive = np.ones(start + len(records), dtype=bool)
+        if self._alive is not None:
+            alive[:start] = self._alive
+        for row, record in enumerate(records, start):
+            previous = self._row_by_id.get(record["id"])
+            if previous is not None:
+                alive[previous] = False
+            self._row_by_id[record["id"]] = row
+        metadatas = [record["metadata"] for record in records]
+        for (field, kind), column in list(self._columns.items()):
+            part = _column_part(metadatas, field, kind, len(metadatas))
+            self._columns[(field, kind)] = (column or part) if kind == "lists" else np.concatenate([column, part])
+        # A new list object: views taken before this append keep their own rows
+        self._records = self._records + records
+        self._alive = None if alive.all() else alive
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+        if scales is not None:
+            self._scales = np.load(self._file("scales.npy"), mmap_mode="r")
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(_DTYPES[self.dtype]), None
+
+    def _decoded(self, rows, view: Optional[_View] = None) -> np.ndarray:
+        vectors, scales = (view.vectors, view.scales) if view is not None else (self._vectors, self._scales)
+        block = np.asarray(vectors[rows], dtype=np.float32)
+        if scales is not None:
+            block *= scales[rows][:, None]
+        return block
+
+    def _live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._alive) if self._alive is not None else np.arange(len(self._records))
+
+    def _sync_ann(self, keep, new_vectors: Optional[np.ndarray]):
+        """
+        Carry the IVF index through a write: drop removed rows, assign appended ones. Appends stay
+        in memory (re-assigned from the vectors on the next open); the index is saved when it is
+        built, retrained or compacted.
+        """
+        if not self.ann_settings.get("enabled", False):
+            return
+        if self._ann is not None:
+            if keep is not None:
+                self._ann.keep(keep)
+            if new_vectors is not None:
+                self._ann.add(new_vectors)
+            if self._ann.needs_retrain():
+                self._ann = None
+            elif keep is not None:
+                self._ann.save(self.path)
+        if self._ann is None:
+            if len(self._records) < self.ann_settings.get("min_rows", 50000):
+                return
+            self._ann = IVFIndex.build(self._vectors, self.ann_settings.get("n_lists"),
+                                       self.ann_settings.get("nprobe", 8))
+            self._ann.save(self.path)
+
+    def compact(self):
+        """Rewrite the files without dead (replaced) rows and persist the IVF index; call after a bulk load."""
+        with self._lock:
+            if self._alive is not None:
+                keep = self._live_rows()
+                self._rewrite(keep)
+                self._sync_ann(keep, None)
+            elif self._ann is not None:
+                self._ann.save(self.path)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    # ---------- VectorStore interface ----------
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [i or uuid.uuid4().hex for i in ids] if ids else [uuid.uuid4().hex for _ in texts]
+        vectors = self._normalize(self.embedding.embed_documents(texts)) if texts else None
+        return self._add(texts, metadatas, ids, vectors)
+
+    async def aadd_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                         ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [i or uuid.uuid4().hex for i in ids] if ids else [uuid.uuid4().hex for _ in texts]
+        vectors = self._normalize(await self.embedding.aembed_documents(texts)) if texts else None
+        return self._add(texts, metadatas, ids, vectors)
+
+    def add_embeddings(self, text_embeddings: Iterable[Tuple[str, List[float]]], metadatas: Optional[List[dict]] = None,
+                       ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """add_texts with vectors computed elsewhere (as FAISS.add_embeddings)."""
+        pairs = list(text_embeddings)
+        texts = [text for text, _ in pairs]
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [i or uuid.uuid4().hex for i in ids] if ids else [uuid.uuid4().hex for _ in texts]
+        vectors = self._normalize([vector for _, vector in pairs]) if pairs else None
+        return self._add(texts, metadatas, ids, vectors)
+
+    def _add(self, texts: List[str], metadatas: List[dict], ids: List[str], vectors) -> List[str]:
+        if vectors is None:
+            return []
+        with self._lock:
+            # Re-adding an id supersedes the old row, as in AstraDB
+            self._append([{"id": i, "text": t, "metadata": m} for i, t, m in zip(ids, texts, metadatas)], vectors)
+            self._sync_ann(None, vectors)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            if self._vectors is None:
+                return True
+            keep = self._live_rows()
+            if ids is not None:
+                doomed = [self._row_by_id[i] for i in ids if i in self._row_by_id]
+                if not doomed and self._alive is None:
+                    return True
+                keep = keep[~np.isin(keep, doomed)]
+            else:
+                keep = keep[:0]
+            self._rewrite(keep)
+            self._sync_ann(keep, None)
+        return True
+
+    def _view(self) -> _View:
+        with self._lock:
+            return _View(self._records, len(self._records), self._vectors, self._scales, self._alive,
+                         self._row_by_id, self._columns)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        view = self._view()
+        return [self._document(view, view.row_by_id[i]) for i in ids if view.row_by_id.get(i, view.rows) < view.rows]
+
+    @staticmethod
+    def _document(view: _View, row: int) -> Document:
+        record = view.records[row]
+        return Document(id=record["id"], page_content=record["text"], metadata=dict(record["metadata"]))
+
+    # ---------- Search ----------
+    def _column(self, view: _View, field: str, kind: str):
+        column = view.columns.get((field, kind))
+        if column is None or (kind != "lists" and len(column) < view.rows):
+            column = _column_part((r["metadata"] for r in view.records[:view.rows]), field, kind, view.rows)
+            view.columns[(field, kind)] = column
+        return column if kind == "lists" else column[:view.rows]
+
+    def _filter_mask(self, view: _View, filter: Dict[str, Any]) -> np.ndarray:
+        """metadata_matches over every row at once."""
+        mask = np.ones(view.rows, dtype=bool)
+        for field, condition in filter.items():
+            if field == "$and":
+                for clause in condition:
+                    mask &= self._filter_mask(view, clause)
+                continue
+            if field == "$or":
+                matched = np.zeros(view.rows, dtype=bool)
+                for clause in condition:
+                    matched |= self._filter_mask(view, clause)
+                mask &= matched
+                continue
+            ops = condition if isinstance(condition, dict) and any(k.startswith("$") for k in condition) \
+                else {"$eq": condition}
+            for op, operand in ops.items():
+                mask &= self._condition_mask(view, field, op, operand)
+        return mask
+
+    def _condition_mask(self, view: _View, field: str, op: str, operand: Any) -> np.ndarray:
+        numeric = isinstance(operand, (int, float)) and not isinstance(operand, bool)
+        if op in ("$gt", "$gte", "$lt", "$lte") and numeric:
+            values = self._column(view, field, "num")
+            with np.errstate(invalid="ignore"):
+                return {"$gt": values > operand, "$gte": values >= operand,
+                        "$lt": values < operand, "$lte": values <= operand}[op]
+        if op in ("$eq", "$ne", "$in", "$nin") and not self._column(view, field, "lists"):
+            values = self._column(view, field, "raw")
+            matched = np.zeros(view.rows, dtype=bool)
+            for candidate in (operand if op in ("$in", "$nin") else [operand]):
+                matched |= np.fromiter((v == candidate for v in values), dtype=bool, count=view.rows) \
+                    if isinstance(candidate, (list, dict)) else (values == candidate).astype(bool)
+            return ~matched if op in ("$ne", "$nin") else matched
+        # List-valued fields and comparisons on strings: evaluate row by row
+        return np.fromiter((metadata_matches(r["metadata"], {field: {op: operand}})
+                            for r in view.records[:view.rows]), dtype=bool, count=view.rows)
+
+    def search_rows(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                    nprobe: Optional[int] = None, view: Optional[_View] = None) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the top-k live rows passing the filter; rows index into view.
+        Approximate through the IVF index when one is built (nprobe overrides the configured value),
+        falling back to the exact scan when a filter leaves fewer than k candidates in the probed lists.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            view = view or _View(self._records, len(self._records), self._vectors, self._scales, self._alive,
+                                 self._row_by_id, self._columns)
+            candidates = self._ann.candidates(query, nprobe) if self._ann is not None else None
+        if view.vectors is None or not view.rows:
+            return []
+        allowed = self._filter_mask(view, filter) if filter else None
+        if view.alive is not None:
+            allowed = view.alive[:view.rows] if allowed is None else allowed & view.alive[:view.rows]
+        if candidates is not None:
+            rows = candidates[candidates < view.rows]
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            if len(rows) >= k or (allowed is None and len(rows)):
+                return self._top_k(rows, self._decoded(rows, view) @ query, k)
+        return self._exact_rows(view, query, k, allowed)
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores)
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+    def _exact_rows(self, view: _View, query: np.ndarray, k: int,
+                    allowed: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, view.rows, _SEARCH_CHUNK_ROWS):
+            rows = np.arange(start, min(start + _SEARCH_CHUNK_ROWS, view.rows))
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+                if not len(rows):
+                    continue
+            scores = self._decoded(rows, view) @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                rows, scores = rows[top], scores[top]
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+        return self._top_k(best_rows, best_scores, k)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        view = self._view()
+        return [(self._document(view, row), score) for row, score in self.search_rows(embedding, k, filter, view=view)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                 **kwargs: Any) -> List[Document]:
+        embedding = await self.embedding.aembed_query(query)
+        return self.similarity_search_by_vector(embedding, k, filter)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, path: Optional[str] = None, collection_name: str = "local",
+                   dtype: str = "float32", ann: Optional[dict] = None, **kwargs: Any) -> "LocalVectorStore":
+        """path defaults to data/vector_store/<collection_name>, where create_vector_store keeps collections."""
+        store = cls(embedding, path or os.path.join("data", "vector_store", collection_name), dtype, ann)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+
+class LocalVectorStoreAdapter(LangchainAdapter[LocalVectorStore]):
+    """graph_retriever adapter: returns documents with their stored embeddings, as traversal requires."""
+
+    def _with_embedding(self, view: _View, row: int) -> Document:
+        doc = self.vector_store._document(view, row)
+        doc.metadata[METADATA_EMBEDDING_KEY] = self.vector_store._decoded([row], view)[0].tolist()
+        return doc
+
+    def _search(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                **kwargs: Any) -> List[Document]:
+        view = self.vector_store._view()
+        return [self._with_embedding(view, row) for row, _ in self.vector_store.search_rows(embedding, k, filter,
+                                                                                            view=view)]
+
+    def _get(self, ids: Sequence[str], filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        view = self.vector_store._view()
+        rows = [view.row_by_id[i] for i in ids if view.row_by_id.get(i, view.rows) < view.rows]
+        return [self._with_embedding(view, row) for row in rows
+                if metadata_matches(view.records[row]["metadata"], filter)]
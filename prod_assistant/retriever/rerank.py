@@ -0,0 +1,121 @@
+# retriever/rerank.py
+import math
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from langchain_core.embeddings import Embeddings
+
+from prod_assistant.retriever.constraints import NUMERIC_FIELDS, to_number
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text import QUERY_STOPWORDS, tokenize
+
+_DEFAULT_WEIGHTS = {"similarity": 0.5, "lexical": 0.3, "rating": 0.1, "reviews": 0.1}
+
+
+def _title(doc: Document) -> str:
+    return str((doc.metadata or {}).get("product_title", ""))
+
+
+def variant_key(title: str) -> str:
+    """
+    Model plus storage, ignoring colour: "Apple iPhone 16 (Teal, 128 GB)" and
+    "Apple iPhone 16 (White, 128 GB)" share a key.
+    """
+    base, _, variant = title.partition("(")
+    specs = [part for part in variant.rstrip(")").split(",") if re.search(r"\d", part)]
+    return " ".join(tokenize(base)) + "|" + " ".join(t for part in specs for t in tokenize(part))
+
+
+class LocalReranker(BaseDocumentCompressor):
+    """
+    Reranks retrieved products with local features and keeps the best top_n:
+    query-title embedding similarity, lexical overlap with the query, rating and review-count priors.
+    Colour variants of the same model/storage are collapsed to the best-scoring one, and documents
+    are dropped once max_context_tokens (whitespace tokens, 0 = unlimited) would be exceeded.
+    """
+
+    embeddings: Optional[Embeddings] = None
+    """Without embeddings the similarity feature is skipped."""
+    top_n: int = 4
+    weights: Dict[str, float] = dict(_DEFAULT_WEIGHTS)
+    dedupe_variants: bool = True
+    max_context_tokens: int = 0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        similarity = None
+        if self.embeddings is not None and documents:
+            similarity = self._similarity(self.embeddings.embed_query(query),
+                                          self.embeddings.embed_documents([_title(d) for d in documents]))
+        return self._select(documents, query, similarity)
+
+    async def acompress_documents(self, documents: Sequence[Document], query: str,
+                                  callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        similarity = None
+        if self.embeddings is not None and documents:
+            similarity = self._similarity(await self.embeddings.aembed_query(query),
+                                          await self.embeddings.aembed_documents([_title(d) for d in documents]))
+        return self._select(documents, query, similarity)
+
+    @staticmethod
+    def _similarity(query_vector, title_vectors) -> np.ndarray:
+        q = np.asarray(query_vector, dtype=np.float32)
+        m = np.asarray(title_vectors, dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1) * (np.linalg.norm(q) or 1.0)
+        return (m @ q) / np.where(norms == 0, 1.0, norms)
+
+    def _scores(self, documents: Sequence[Document], query: str, similarity: Optional[np.ndarray]) -> np.ndarray:
+        terms = {t for t in tokenize(query) if t not in QUERY_STOPWORDS}
+        ratings = np.array([to_number(d.metadata.get(NUMERIC_FIELDS["rating"], d.metadata.get("rating"))) or 0.0
+                            for d in documents])
+        reviews = np.array([to_number(d.metadata.get(NUMERIC_FIELDS["reviews"], d.metadata.get("total_reviews")))
+                            or 0.0 for d in documents])
+        lexical = np.array([len(terms & set(tokenize(_title(d) + " " + d.page_content))) / len(terms) if terms else 0.0
+                            for d in documents])
+        scores = self.weights.get("lexical", 0.0) * lexical
+        scores += self.weights.get("rating", 0.0) * ratings / 5.0
+        scores += self.weights.get("reviews", 0.0) * np.log1p(reviews) / math.log1p(max(reviews.max(), 1.0))
+        if similarity is not None:
+            scores += self.weights.get("similarity", 0.0) * similarity
+        return scores
+
+    def _select(self, documents: Sequence[Document], query: str, similarity: Optional[np.ndarray]) -> List[Document]:
+        if not documents:
+            return []
+        scores = self._scores(documents, query, similarity)
+        kept, seen, tokens = [], set(), 0
+        for idx in np.argsort(-scores, kind="stable"):
+            doc = documents[idx]
+            if self.dedupe_variants:
+                key = variant_key(_title(doc))
+                if key in seen:
+                    continue
+                seen.add(key)
+            cost = len(doc.page_content.split())
+            if kept and self.max_context_tokens and tokens + cost > self.max_context_tokens:
+                break
+            kept.append(doc)
+            tokens += cost
+            if len(kept) >= self.top_n:
+                break
+        METRICS.observe("reranker.dropped_documents", len(documents) - len(kept))
+        return kept
+
+
+def build_reranker(settings: dict, model_loader) -> Optional[LocalReranker]:
+    """Build the rerank stage from the `retriever.rerank` block in config.yaml, or None if disabled."""
+    if not settings.get("enabled", False):
+        return None
+    return LocalReranker(
+        embeddings=model_loader.load_embeddings() if settings.get("use_embeddings", True) else None,
+        top_n=settings.get("top_n", 4),
+        weights={**_DEFAULT_WEIGHTS, **(settings.get("weights") or {})},
+        dedupe_variants=settings.get("dedupe_variants", True),
+        max_context_tokens=settings.get("max_context_tokens", 0),
+    )
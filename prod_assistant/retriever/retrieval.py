@@ -1,14 +1,31 @@
 import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from langchain_astradb import AstraDBVectorStore
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
 from graph_retriever.strategies import Eager
 from langchain.retrievers import ContextualCompressionRetriever
-from langchain.retrievers.document_compressors import LLMChainExtractor
+from langchain.retrievers.document_compressors import DocumentCompressorPipeline
 
 from langchain_graph_retriever import GraphRetriever
+from langchain_graph_retriever.adapters.inference import infer_adapter
 from prod_assistant.utils.config_loader import load_config
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.context_builder import format_docs
+from prod_assistant.utils.semantic_cache import collection_version_path
+from prod_assistant.logger import GLOBAL_LOGGER as log
+from prod_assistant.retriever.compression import build_compressor
+from prod_assistant.retriever.rerank import build_reranker
+from prod_assistant.retriever.lexical_index import BM25Index, HybridRetriever, documents_path, load_documents
+from prod_assistant.retriever.constraints import ConstrainedRetriever, NumericIndex
+from prod_assistant.retriever.adjacency import AdjacencyIndex, CachedAdjacencyAdapter, CachedGraphRetriever
+from prod_assistant.retriever.local_vector_store import LocalVectorStore
+from prod_assistant.retriever.vector_store import create_vector_store, graph_store
 from dotenv import load_dotenv
 import sys
 from pathlib import Path
@@ -17,9 +34,14 @@ from prod_assistant.evaluation.ragas_eval import evaluate_context_precision, eva
 # project_root = Path(__file__).resolve().parents[2]
 # sys.path.insert(0, str(project_root))
 
+# (outgoing metadata field, incoming metadata field) pairs traversed by GraphRetriever
+PRODUCT_EDGES = [("product", "product_title"), ("price", "price"), ("rating", "rating"), ("reviews", "total_reviews")]
+
 class Retriever:
-    def __init__(self):
+    def __init__(self, vstore: Optional[VectorStore] = None):
         """Initialize the Retriever class.
+        A pre-built vector store can be passed in (e.g. an in-memory store for benchmarks);
+        otherwise the AstraDB collection from config is opened on first use.
         """
         self.model_loader=ModelLoader()
         self.config=load_config()
@@ -30,8 +52,20 @@ class Retriever:
         self.db_application_token = self.model_loader.api_key_mgr.get("ASTRA_DB_APPLICATION_TOKEN")
         self.db_keyspace = self.model_loader.api_key_mgr.get("ASTRA_DB_KEYSPACE")
         
-        self.vstore = None
+        self.vstore = vstore
+        self._own_vstore = vstore is None
         self.retriever = None
+        self.numeric_index = None
+        # Bounded pool for retrieval stages that have no native async implementation
+        workers = self.config.get("retriever", {}).get("thread_pool_workers", 8)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retriever")
+        # Concurrent first requests build the retriever once
+        self._load_lock = threading.Lock()
+        # The in-memory indexes are rebuilt when DataIngestion bumps the collection version
+        self._version_path = collection_version_path(self.config["astra_db"]["collection_name"],
+                                                     self.config.get("semantic_cache", {}).get("version_dir", "data"))
+        self._version = None
+        self._version_checked_at = time.monotonic()
     
     def load_env_variables(self):
         """Load environment variables for the retriever.
@@ -54,33 +88,128 @@ class Retriever:
 
     def load_retriever(self):
         """Load the retriever model.
+        Rebuilt (snapshot, BM25, numeric and adjacency indexes) once the collection has been
+        re-ingested; callers keep the previous retriever until the new one is built.
         """
+        with self._load_lock:
+            version = self._read_version()
+            if self.retriever is None or version != self._version:
+                if self.retriever is not None:
+                    log.info("Collection re-ingested; rebuilding retriever", version_path=self._version_path)
+                    if self._own_vstore and isinstance(self.vstore, LocalVectorStore):
+                        self.vstore = None  # reopen the files DataIngestion rewrote
+                self.retriever = self._build_retriever()
+                self._version = version
+            return self.retriever
+
+    def _build_retriever(self):
         if not self.vstore:
-            collection_name = self.config["astra_db"]["collection_name"]
-            
-            self.vstore = AstraDBVectorStore(
-                embedding= self.model_loader.load_embeddings(),
-                collection_name=collection_name,
+            self.vstore = create_vector_store(
+                self.config,
+                self.model_loader.load_embeddings(),
                 api_endpoint=self.db_api_endpoint,
-                token= self.db_application_token,
+                token=self.db_application_token,
                 namespace=self.db_keyspace,
-                )
-        if not self.retriever:
-            top_k = self.config["retriever"]["top_k"] if "retriever" in self.config else 3
-            retriever = GraphRetriever(store=self.vstore,
-                edges=[("product", "product_title"), ("price", "price"), ("rating", "rating"), ("reviews", "total_reviews")],
-                strategy=Eager(k=top_k, start_k=1, max_depth=2),
             )
-            # retriever=self.vstore.as_retriever(search_kwargs={"k": top_k})
-            llm = self.model_loader.load_llm()
-            compressor = LLMChainExtractor.from_llm(llm)
-            self.retriever = ContextualCompressionRetriever(
+        top_k = self.config["retriever"]["top_k"] if "retriever" in self.config else 3
+        retriever = self._graph_retriever(top_k)
+        # retriever=self.vstore.as_retriever(search_kwargs={"k": top_k})
+        documents = self._load_snapshot()
+        retriever = self._with_constraints(retriever, documents, top_k)
+        retriever = self._with_lexical_index(retriever, documents, top_k)
+        compressor = self._post_processor()
+        if compressor is not None:
+            retriever = ContextualCompressionRetriever(
                 base_compressor=compressor,
                 base_retriever=retriever
             )
-            print("Retriever loaded successfully.")
-            return self.retriever
-    
+        print("Retriever loaded successfully.")
+        return retriever
+
+    def _read_version(self) -> Optional[float]:
+        return os.path.getmtime(self._version_path) if os.path.exists(self._version_path) else None
+
+    def _index_changed(self) -> bool:
+        """Whether the collection was re-ingested since the retriever was built; stats at most once a second."""
+        now = time.monotonic()
+        if now - self._version_checked_at < 1.0:
+            return False
+        self._version_checked_at = now
+        return self._read_version() != self._version
+
+    def _reload(self):
+        try:
+            self.load_retriever()
+        except Exception as e:
+            log.error("Retriever rebuild failed; serving the previous one", error=str(e))
+
+    def _graph_retriever(self, top_k):
+        """GraphRetriever over the vector store; with `retriever.adjacency_cache` enabled, only the seed
+        similarity search goes to the store and edges are expanded from the ingestion-time adjacency index.
+        """
+        settings = self.config.get("retriever", {})
+        strategy = Eager(k=top_k, start_k=1, max_depth=2)
+        if settings.get("adjacency_cache", {}).get("enabled", False):
+            index = AdjacencyIndex.load(self.config["astra_db"]["collection_name"], settings.get("index_dir", "data"),
+                                        incoming_fields=[incoming for _, incoming in PRODUCT_EDGES])
+            if index is not None:
+                store = CachedAdjacencyAdapter(infer_adapter(graph_store(self.vstore)), index)
+                return CachedGraphRetriever(store=store, edges=PRODUCT_EDGES, strategy=strategy)
+        return GraphRetriever(store=graph_store(self.vstore), edges=PRODUCT_EDGES, strategy=strategy)
+
+    def _load_snapshot(self) -> Optional[List[Document]]:
+        """Documents written by DataIngestion; the in-memory BM25 and numeric indexes are built from them."""
+        settings = self.config.get("retriever", {})
+        path = documents_path(self.config["astra_db"]["collection_name"], settings.get("index_dir", "data"))
+        if not os.path.exists(path):
+            log.warning("Document snapshot missing; in-memory indexes disabled", path=path)
+            return None
+        documents = load_documents(path)
+        log.info("Document snapshot loaded", path=path, documents=len(documents))
+        return documents
+
+    def _with_constraints(self, retriever, documents, top_k):
+        """Apply price/rating bounds from the query when `retriever.numeric_filters` is enabled."""
+        settings = self.config.get("retriever", {}).get("numeric_filters", {})
+        if not settings.get("enabled", False):
+            return retriever
+        self.numeric_index = NumericIndex(documents) if documents else None
+        return ConstrainedRetriever(
+            base=retriever,
+            numeric_index=self.numeric_index,
+            k=top_k,
+            # Range filters are pushed down to AstraDB and the local store; others only get the post-filter
+            pushdown=(settings.get("pushdown", True)
+                      and isinstance(self.vstore, (AstraDBVectorStore, LocalVectorStore))),
+        )
+
+    def _with_lexical_index(self, retriever, documents, top_k):
+        """Fuse the vector retriever with the BM25 index when `retriever.hybrid` is enabled."""
+        settings = self.config.get("retriever", {}).get("hybrid", {})
+        if not settings.get("enabled", False) or not documents:
+            return retriever
+        return HybridRetriever(
+            vector_retriever=retriever,
+            index=BM25Index(documents),
+            numeric_index=self.numeric_index,
+            k=top_k,
+            lexical_k=settings.get("lexical_k", 20),
+            rrf_k=settings.get("rrf_k", 60),
+            exact_match=settings.get("exact_match", True),
+        )
+
+    def _post_processor(self):
+        """Rerank (`retriever.rerank`) then compress (`retriever.compression`) the retrieved documents;
+        the reranker runs first so only the documents that reach the prompt are compressed.
+        """
+        settings = self.config.get("retriever", {})
+        stages = [stage for stage in (build_reranker(settings.get("rerank", {}), self.model_loader),
+                                      build_compressor(settings.get("compression", {}), self.model_loader))
+                  if stage is not None]
+        if len(stages) > 1:
+            return DocumentCompressorPipeline(transformers=stages)
+        return stages[0] if stages else None
+
     def call_retriever(self,query):
         """Call the retriever model.
         """
@@ -88,6 +217,29 @@ class Retriever:
         output=retriever.invoke(query)
         return output
 
+    async def acall_retriever(self, query: str) -> List[Document]:
+        """Call the retriever without blocking the event loop.
+        GraphRetriever, the AstraDB adapter and the compressors are natively async; a retriever
+        that only implements the sync path is run on the bounded retriever thread pool, as is
+        load_retriever on the first call and after the collection is re-ingested.
+        """
+        loop = asyncio.get_running_loop()
+        retriever = self.retriever
+        if retriever is None:
+            # The first call opens the vector store and builds the in-memory indexes (blocking I/O)
+            retriever = await loop.run_in_executor(self._executor, self.load_retriever)
+        elif self._index_changed():
+            # Rebuild in the background; this and concurrent requests use the current retriever
+            self._executor.submit(self._reload)
+        if self._supports_async(retriever):
+            return await retriever.ainvoke(query)
+        return await loop.run_in_executor(self._executor, retriever.invoke, query)
+
+    @staticmethod
+    def _supports_async(retriever: BaseRetriever) -> bool:
+        base = getattr(retriever, "base_retriever", retriever)
+        return type(base)._aget_relevant_documents is not BaseRetriever._aget_relevant_documents
+
 if __name__ == "__main__":
     user_query = "What is the price and rating of Apple iPhone 14 Pro Max?"
     
@@ -96,22 +248,8 @@ if __name__ == "__main__":
     retrieved_docs = retriever_obj.call_retriever(user_query)
     print(retrieved_docs)
 
-    def _format_docs(docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
     
-    retrieved_contexts = [_format_docs(retrieved_docs)]
+    retrieved_contexts = [format_docs(retrieved_docs)]
     print(retrieved_contexts)
     
     #this is not an actual output this have been written to test the pipeline
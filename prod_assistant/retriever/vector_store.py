@@ -0,0 +1,47 @@
+# retriever/vector_store.py
+import os
+from typing import Union
+
+from graph_retriever.adapters import Adapter
+from langchain_astradb import AstraDBVectorStore
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from prod_assistant.retriever.local_vector_store import LocalVectorStore, LocalVectorStoreAdapter
+
+
+def create_vector_store(config: dict, embeddings: Embeddings, api_endpoint=None, token=None,
+                        namespace=None) -> VectorStore:
+    """
+    Open the collection on the backend selected by `vector_store.backend` in config.yaml:
+    "astra" (default) or "local" (LocalVectorStore under <vector_store.local.path>/<collection>).
+    """
+    collection_name = config["astra_db"]["collection_name"]
+    settings = config.get("vector_store", {})
+    if settings.get("backend", "astra") == "local":
+        local = settings.get("local", {})
+        path = local.get("path", "data/vector_store")
+        if not os.path.isabs(path):
+            path = os.path.join(os.getcwd(), path)
+        return LocalVectorStore(embeddings, os.path.join(path, collection_name), dtype=local.get("dtype", "float32"),
+                                ann=local.get("ann"))
+    return AstraDBVectorStore(
+        embedding=embeddings,
+        collection_name=collection_name,
+        api_endpoint=api_endpoint,
+        token=token,
+        namespace=namespace,
+    )
+
+
+def graph_store(vstore: VectorStore) -> Union[Adapter, VectorStore]:
+    """What to hand GraphRetriever: stores it cannot infer an adapter for are wrapped here."""
+    if isinstance(vstore, LocalVectorStore):
+        return LocalVectorStoreAdapter(vstore)
+    return vstore
+
+
+def compact_store(vstore: VectorStore):
+    """After a bulk load: the local store drops rows superseded by upserts and saves its IVF index."""
+    if isinstance(vstore, LocalVectorStore):
+        vstore.compact()
@@ -1,18 +1,57 @@
 import uvicorn
+from contextlib import asynccontextmanager
+from typing import Optional
+import uuid
+import json
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 from langchain_core.messages import HumanMessage
 import asyncio
 
 from prod_assistant.workflow.agentic_rag_workflow_with_mcp import AgenticRAG
+from prod_assistant.logger import GLOBAL_LOGGER as log
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.admission import AdmissionRejected, get_limiter
 
-app = FastAPI()
+WARMUP_RETRY_SECONDS = 5
+
+
+async def _warm_up(app: FastAPI):
+    """Build the shared AgenticRAG for this worker, retrying until the MCP server is reachable."""
+    while True:
+        try:
+            app.state.rag_agent = await AgenticRAG.async_init()
+            app.state.ready = True
+            log.info("AgenticRAG warm-up complete")
+            return
+        except Exception as e:
+            log.warning("AgenticRAG warm-up failed, retrying", error=str(e), retry_in=WARMUP_RETRY_SECONDS)
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Retriever, LLM clients, MCP tools and the compiled graph are built once per worker
+    # and shared by every request; the MCP server may still be starting, so warm up in the background.
+    app.state.rag_agent = None
+    app.state.ready = False
+    warmup_task = asyncio.create_task(_warm_up(app))
+    yield
+    warmup_task.cancel()
+    if app.state.rag_agent is not None:
+        await app.state.rag_agent.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+chat_limiter = get_limiter("chat")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,25 +60,101 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Fast rejection when the endpoint or an upstream (LLM, MCP, AstraDB) limiter is saturated."""
+    return HTMLResponse("The assistant is busy right now, please try again shortly.", status_code=exc.status_code,
+                        headers={"Retry-After": str(exc.retry_after)})
+
+
 # ---------- FastAPI Endpoints ----------
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/health")
+async def health():
+    """Liveness probe: the worker process is up."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready(request: Request):
+    """Readiness probe: reports ready only once the shared agent has finished warming up."""
+    if not request.app.state.ready:
+        return JSONResponse({"status": "warming_up"}, status_code=503,
+                            headers={"Retry-After": str(WARMUP_RETRY_SECONDS)})
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """In-process metrics for this worker (coalescing, caches, queues, timings)."""
+    return METRICS.snapshot()
+
+
 @app.post("/get", response_class=HTMLResponse)
-async def chat(msg: str = Form(...)):
+async def chat(request: Request, msg: str = Form(...), thread_id: Optional[str] = Form(None)):
     """Call the Agentic RAG workflow."""
-    rag_agent = await AgenticRAG.async_init()
-    answer = await rag_agent.run(msg)   # run() already returns final answer string
+    rag_agent = request.app.state.rag_agent
+    if rag_agent is None:
+        return HTMLResponse("The assistant is still starting up, please try again shortly.", status_code=503,
+                            headers={"Retry-After": str(WARMUP_RETRY_SECONDS)})
+
+    # The agent is shared by all requests, so every conversation needs its own checkpoint thread
+    async with chat_limiter:
+        # Identical concurrent questions share one workflow execution
+        answer = await rag_agent.run_coalesced(msg, thread_id=thread_id or str(uuid.uuid4()))   # returns final answer string
     print(f"Agentic Response: {answer}")
     return answer
 
 
+def _sse(event: dict) -> str:
+    """Encode a workflow event as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@app.post("/get/stream")
+async def chat_stream(request: Request, msg: str = Form(...), thread_id: Optional[str] = Form(None)):
+    """Stream node progress and answer tokens from the Agentic RAG workflow as Server-Sent Events."""
+    rag_agent = request.app.state.rag_agent
+    if rag_agent is None:
+        return HTMLResponse("The assistant is still starting up, please try again shortly.", status_code=503,
+                            headers={"Retry-After": str(WARMUP_RETRY_SECONDS)})
+
+    # Admit before the response starts so saturation is still reported as 429/503 with Retry-After
+    await chat_limiter.acquire()
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            chat_limiter.release()
+
+    async def event_stream():
+        try:
+            async for event in rag_agent.astream(msg, thread_id=thread_id or str(uuid.uuid4())):
+                yield _sse(event)
+        except AdmissionRejected:
+            yield _sse({"type": "error", "message": "The assistant is busy right now, please try again shortly."})
+        except Exception as e:
+            log.error("Streaming chat failed", error=str(e))
+            yield _sse({"type": "error", "message": "Sorry, something went wrong while answering."})
+        finally:
+            release_slot()
+
+    # The background task covers a client that disconnects before the stream is ever iterated
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(release_slot))
+
+
 def run_server():
     """Entry point for the ecomm-assistant command."""
     uvicorn.run("main:app", host="0.0.0.0", port=8001, workers=2)
 
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    run_server()
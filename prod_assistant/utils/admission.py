@@ -0,0 +1,104 @@
+# utils/admission.py
+import asyncio
+import time
+from typing import Dict
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a limiter cannot admit a request.
+    status_code is 429 when the wait queue is full and 503 when the queue wait timed out.
+    """
+
+    def __init__(self, limiter_name: str, reason: str, status_code: int, retry_after: int):
+        self.limiter_name = limiter_name
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"{limiter_name} saturated: {reason}")
+
+
+class ConcurrencyLimiter:
+    """
+    Async concurrency limiter with a bounded wait queue and queue timeout.
+    Use as `async with limiter:` or with explicit acquire()/release().
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_seconds: float,
+                 retry_after_seconds: int = 5):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+
+    async def acquire(self):
+        if not self._semaphore.locked():
+            # Free slot: Semaphore.acquire returns without suspending, so no queueing is involved
+            await self._semaphore.acquire()
+            METRICS.observe(f"admission.{self.name}.wait_seconds", 0.0)
+        else:
+            await self._wait_in_queue()
+
+        self._in_flight += 1
+        METRICS.set_gauge(f"admission.{self.name}.in_flight", self._in_flight)
+
+    async def _wait_in_queue(self):
+        if self._waiting >= self.max_queue:
+            METRICS.incr(f"admission.{self.name}.rejected_queue_full")
+            raise AdmissionRejected(self.name, "wait queue full", 429, self.retry_after_seconds)
+
+        self._waiting += 1
+        METRICS.set_gauge(f"admission.{self.name}.queue_depth", self._waiting)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            METRICS.incr(f"admission.{self.name}.rejected_timeout")
+            log.warning("Admission queue timeout", limiter=self.name, timeout=self.queue_timeout_seconds)
+            raise AdmissionRejected(self.name, "timed out waiting in queue", 503, self.retry_after_seconds)
+        finally:
+            self._waiting -= 1
+            METRICS.set_gauge(f"admission.{self.name}.queue_depth", self._waiting)
+            METRICS.observe(f"admission.{self.name}.wait_seconds", time.perf_counter() - start)
+
+    def release(self):
+        self._in_flight -= 1
+        METRICS.set_gauge(f"admission.{self.name}.in_flight", self._in_flight)
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_LIMITERS: Dict[str, ConcurrencyLimiter] = {}
+
+_DEFAULT_LIMITS = {
+    "max_concurrency": 8,
+    "max_queue": 32,
+    "queue_timeout_seconds": 30,
+    "retry_after_seconds": 5,
+}
+
+
+def get_limiter(name: str) -> ConcurrencyLimiter:
+    """
+    Return the process-wide limiter for `name` (e.g. "chat", "llm", "mcp", "astra_db"),
+    built from the `admission` block in config.yaml.
+    """
+    if name not in _LIMITERS:
+        limits = {**_DEFAULT_LIMITS, **(load_config().get("admission", {}).get(name) or {})}
+        _LIMITERS[name] = ConcurrencyLimiter(name, **limits)
+        log.info("Admission limiter created", limiter=name, **limits)
+    return _LIMITERS[name]
@@ -0,0 +1,128 @@
+# utils/context_builder.py
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.utils.text import REVIEW_BOILERPLATE
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_SEPARATOR = "\n\n---\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 characters per token, but never fewer tokens than words."""
+    return max(len(text.split()), (len(text) + 3) // 4)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4].rsplit(" ", 1)[0]
+    words = cut.split()[:max_tokens]
+    return " ".join(words).rstrip(",.;: ") + " ..."
+
+
+class ContextBuilder:
+    """
+    Turns retrieved product documents into the prompt context.
+
+    page_content repeats the title, price and rating already held in metadata, so only the reviews
+    are taken from it. Reviews are stripped of reviewer boilerplate, deduplicated and truncated to
+    max_review_tokens; at most max_reviews_per_doc are kept per product. Documents are packed in
+    retrieval order until max_tokens is reached: a product whose header no longer fits is dropped,
+    one whose header fits keeps as many reviews as the remaining budget allows.
+    """
+
+    def __init__(self, max_tokens: int = 1500, max_reviews_per_doc: int = 3, max_review_tokens: int = 60):
+        self.max_tokens = max_tokens
+        self.max_reviews_per_doc = max_reviews_per_doc
+        self.max_review_tokens = max_review_tokens
+
+    @classmethod
+    def from_config(cls) -> "ContextBuilder":
+        """Build from the `context` block in config.yaml."""
+        settings = load_config().get("context", {})
+        return cls(max_tokens=settings.get("max_tokens", 1500),
+                   max_reviews_per_doc=settings.get("max_reviews_per_doc", 3),
+                   max_review_tokens=settings.get("max_review_tokens", 60))
+
+    # ---------- Parts ----------
+    @staticmethod
+    def _header(doc: Document) -> str:
+        meta = doc.metadata or {}
+        rating = f"Rating: {meta.get('rating', 'N/A')}"
+        if meta.get("total_reviews") not in (None, ""):
+            rating += f" ({meta['total_reviews']} reviews)"
+        return f"Title: {meta.get('product_title', 'N/A')}\nPrice: {meta.get('price', 'N/A')}\n{rating}"
+
+    def _reviews(self, doc: Document) -> List[str]:
+        _, sep, reviews = doc.page_content.partition("top_reviews:")
+        if not sep:
+            reviews = doc.page_content
+        kept, seen = [], set()
+        for review in reviews.split("||"):
+            review = " ".join(REVIEW_BOILERPLATE.sub("", review).split())
+            key = review.lower()
+            if not review or key in seen:
+                continue
+            seen.add(key)
+            kept.append(_truncate(review, self.max_review_tokens))
+            if len(kept) >= self.max_reviews_per_doc:
+                break
+        return kept
+
+    @staticmethod
+    def _unpacked_tokens(doc: Document) -> int:
+        """Size of the document rendered in full: metadata header plus the whole page_content."""
+        meta = doc.metadata or {}
+        fields = (meta.get("product_title", "N/A"), meta.get("price", "N/A"), meta.get("rating", "N/A"))
+        return estimate_tokens(" ".join(str(f) for f in fields)) + 6 + estimate_tokens(doc.page_content)
+
+    # ---------- Public API ----------
+    def build(self, docs: Optional[Sequence[Document]], empty: str = "No relevant documents found.") -> str:
+        if not docs:
+            return empty
+        blocks, used = [], 0
+        for doc in docs:
+            header = self._header(doc)
+            cost = estimate_tokens(header) + (estimate_tokens(_SEPARATOR) if blocks else 0)
+            if blocks and used + cost > self.max_tokens:
+                break
+            lines = [header]
+            reviews = self._reviews(doc)
+            if reviews:
+                lines.append("Reviews:")
+                cost += 2
+            for review in reviews:
+                review_cost = estimate_tokens(review) + 1
+                if used + cost + review_cost > self.max_tokens:
+                    break
+                lines.append(f"- {review}")
+                cost += review_cost
+            if lines[-1] == "Reviews:":
+                lines.pop()
+                cost -= 2
+            blocks.append("\n".join(lines))
+            used += cost
+
+        context = _SEPARATOR.join(blocks)
+        unpacked = sum(self._unpacked_tokens(doc) for doc in docs) + estimate_tokens(_SEPARATOR) * (len(docs) - 1)
+        saved = max(unpacked - estimate_tokens(context), 0)
+        METRICS.observe("context_builder.tokens", estimate_tokens(context))
+        METRICS.observe("context_builder.tokens_saved", saved)
+        log.info("Context built", documents=len(docs), packed=len(blocks), tokens=estimate_tokens(context),
+                 tokens_saved=saved)
+        return context
+
+
+_BUILDER: Optional[ContextBuilder] = None
+
+
+def format_docs(docs: Optional[Sequence[Document]], empty: str = "No relevant documents found.") -> str:
+    """Format retrieved documents into prompt context with the process-wide ContextBuilder."""
+    global _BUILDER
+    if _BUILDER is None:
+        _BUILDER = ContextBuilder.from_config()
+    return _BUILDER.build(docs, empty)
@@ -0,0 +1,179 @@
+# utils/embedding_cache.py
+import asyncio
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+class EmbeddingStore:
+    """
+    Two-tier vector cache: an in-memory LRU in front of an optional SQLite file.
+    The SQLite file survives restarts and is shared by every process on the host (WAL mode).
+    """
+
+    def __init__(self, sqlite_path: Optional[str] = None, memory_items: int = 10000):
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # The memory lock is never held across SQLite calls, so memory hits never wait on disk I/O
+        self._lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._conn = None
+        if sqlite_path:
+            os.makedirs(os.path.dirname(sqlite_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(sqlite_path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self._conn is not None
+
+    def get_many(self, keys: Sequence[str], memory_only: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """Cached vectors by key. memory_only: None unless every key is in the memory tier (no SQLite read)."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+        if memory_only and len(found) < len(keys):
+            return None
+        METRICS.incr("embedding_cache.memory_hits", len(found))
+
+        missing = [key for key in keys if key not in found]
+        if missing and self._conn is not None:
+            disk = {}
+            with self._conn_lock:
+                for start in range(0, len(missing), 500):  # stay under SQLite's bound-parameter limit
+                    chunk = missing[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    disk.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+            with self._lock:
+                for key, vector in disk.items():
+                    self._remember(key, vector)
+            found.update(disk)
+            METRICS.incr("embedding_cache.disk_hits", len(disk))
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+        if self._conn is not None and items:
+            with self._conn_lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()],
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated texts from an EmbeddingStore.
+    Keys are (model_name, kind, sha256(text)); queries and documents are cached separately because
+    providers such as Google embed them with different task types.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, store: EmbeddingStore):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.store = store
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _lookup(self, kind: str, texts: List[str]):
+        keys = [self._key(kind, text) for text in texts]
+        found = self.store.get_many(list(dict.fromkeys(keys)))
+        # Deduplicate misses so repeated texts in one batch are embedded once
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        METRICS.incr("embedding_cache.misses", len(missing))
+        return keys, found, missing
+
+    def _store(self, kind: str, texts: List[str], vectors: List[List[float]], found: Dict[str, np.ndarray]):
+        new_items = {self._key(kind, text): np.asarray(vector, dtype=np.float32) for text, vector in zip(texts, vectors)}
+        self.store.put_many(new_items)
+        found.update(new_items)
+
+    async def _alookup(self, kind: str, texts: List[str]):
+        # Memory hits are answered on the event loop; SQLite reads run in a worker thread
+        if not self.store.persistent:
+            return self._lookup(kind, texts)
+        keys = [self._key(kind, text) for text in texts]
+        found = self.store.get_many(list(dict.fromkeys(keys)), memory_only=True)
+        if found is not None:
+            return keys, found, []
+        return await asyncio.to_thread(self._lookup, kind, texts)
+
+    async def _astore(self, kind: str, texts: List[str], vectors: List[List[float]], found: Dict[str, np.ndarray]):
+        if self.store.persistent:
+            await asyncio.to_thread(self._store, kind, texts, vectors, found)
+        else:
+            self._store(kind, texts, vectors, found)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup("document", texts)
+        if missing:
+            self._store("document", missing, self.underlying.embed_documents(missing), found)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._lookup("query", [text])
+        if missing:
+            self._store("query", missing, [self.underlying.embed_query(text)], found)
+        return found[keys[0]].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await self._alookup("document", texts)
+        if missing:
+            await self._astore("document", missing, await self.underlying.aembed_documents(missing), found)
+        return [found[key].tolist() for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await self._alookup("query", [text])
+        if missing:
+            await self._astore("query", missing, [await self.underlying.aembed_query(text)], found)
+        return found[keys[0]].tolist()
+
+    @staticmethod
+    def stats() -> dict:
+        """Process-wide hit/miss counters across all cached embedding models."""
+        counters = {name: METRICS.counter(f"embedding_cache.{name}") for name in ("memory_hits", "disk_hits", "misses")}
+        lookups = sum(counters.values())
+        counters["hit_ratio"] = (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0
+        return counters
+
+
+_STORES: Dict[str, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_embedding_store(sqlite_path: Optional[str], memory_items: int) -> EmbeddingStore:
+    """Return the process-wide store for `sqlite_path` so every ModelLoader shares one memory tier."""
+    key = sqlite_path or ":memory:"
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = EmbeddingStore(sqlite_path, memory_items)
+            log.info("Embedding cache opened", path=key, memory_items=memory_items)
+        return _STORES[key]
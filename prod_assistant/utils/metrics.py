@@ -0,0 +1,85 @@
+# utils/metrics.py
+import threading
+from collections import defaultdict, deque
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process counters, gauges and timing summaries.
+    Values are per process (i.e. per uvicorn worker) and exposed through the /metrics endpoint.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._timings = defaultdict(lambda: {"count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=max_samples)})
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record one observation (e.g. a latency in seconds) for a summary metric."""
+        with self._lock:
+            timing = self._timings[name]
+            timing["count"] += 1
+            timing["sum"] += value
+            timing["max"] = max(timing["max"], value)
+            timing["samples"].append(value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def drain(self) -> dict:
+        """Counters and timings recorded since the last drain, reset here; for merge() in another process."""
+        with self._lock:
+            delta = {"counters": dict(self._counters),
+                     "timings": {name: {"count": t["count"], "sum": t["sum"], "max": t["max"],
+                                        "samples": list(t["samples"])} for name, t in self._timings.items()}}
+            self._counters.clear()
+            self._timings.clear()
+            return delta
+
+    def merge(self, delta: dict):
+        """Add a drain() result (e.g. from a worker process) to this registry."""
+        with self._lock:
+            for name, value in delta.get("counters", {}).items():
+                self._counters[name] += value
+            for name, other in delta.get("timings", {}).items():
+                timing = self._timings[name]
+                timing["count"] += other["count"]
+                timing["sum"] += other["sum"]
+                timing["max"] = max(timing["max"], other["max"])
+                timing["samples"].extend(other["samples"])
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {}
+            for name, timing in self._timings.items():
+                samples = sorted(timing["samples"])
+                timings[name] = {
+                    "count": timing["count"],
+                    "mean": timing["sum"] / timing["count"] if timing["count"] else 0.0,
+                    "max": timing["max"],
+                    "p50": _percentile(samples, 0.50),
+                    "p95": _percentile(samples, 0.95),
+                    "p99": _percentile(samples, 0.99),
+                }
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "timings": timings}
+
+
+def _percentile(sorted_samples, q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+# Single shared registry for the process
+METRICS = MetricsRegistry()
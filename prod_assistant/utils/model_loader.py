@@ -8,6 +8,7 @@ from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from prod_assistant.logger import GLOBAL_LOGGER as log
 from prod_assistant.exception.custom_exception import ProductAssistantException
+from prod_assistant.utils.embedding_cache import CachedEmbeddings, get_embedding_store
 import asyncio
 
 
@@ -45,7 +46,8 @@ class ModelLoader:
 
     def load_embeddings(self):
         """
-        Load and return embedding model from Google Generative AI.
+        Load and return embedding model from Google Generative AI,
+        wrapped in the persistent embedding cache when `embedding_cache.enabled` is set.
         """
         try:
             model_name = self.config["embedding_model"]["model_name"]
@@ -60,10 +62,20 @@ class ModelLoader:
             except RuntimeError:
                 asyncio.set_event_loop(asyncio.new_event_loop())
 
-            return GoogleGenerativeAIEmbeddings(
+            embeddings = GoogleGenerativeAIEmbeddings(
                 model=model_name,
                 google_api_key=self.api_key_mgr.get("GOOGLE_API_KEY")  # type: ignore
             )
+
+            cache_config = self.config.get("embedding_cache", {})
+            if not cache_config.get("enabled", False):
+                return embeddings
+
+            sqlite_path = cache_config.get("sqlite_path")
+            if sqlite_path and not os.path.isabs(sqlite_path):
+                sqlite_path = os.path.join(os.getcwd(), sqlite_path)
+            store = get_embedding_store(sqlite_path, cache_config.get("memory_items", 10000))
+            return CachedEmbeddings(embeddings, model_name, store)
         except Exception as e:
             log.error("Error loading embedding model", error=str(e))
             raise ProductAssistantException("Failed to load embedding model", sys)
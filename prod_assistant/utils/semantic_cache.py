@@ -0,0 +1,149 @@
+# utils/semantic_cache.py
+import os
+import re
+import time
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def collection_version_path(collection_name: str, version_dir: str = "data") -> str:
+    """File whose mtime changes whenever DataIngestion changes the collection."""
+    if not os.path.isabs(version_dir):
+        version_dir = os.path.join(os.getcwd(), version_dir)
+    return os.path.join(version_dir, f"{collection_name}.version")
+
+
+def bump_collection_version(collection_name: str, version_dir: str = "data"):
+    """Mark a collection as re-ingested so semantic caches built on it are invalidated."""
+    path = collection_version_path(collection_name, version_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on query-embedding similarity.
+
+    Normalized query vectors live in a preallocated float32 matrix used as a ring buffer, so a lookup
+    is a single matrix-vector product. A hit needs cosine similarity >= threshold, an unexpired entry,
+    and the same numbers in both queries ("iPhone 15" and "iPhone 16" embed almost identically).
+    Entries are dropped when the collection's version file changes (see bump_collection_version).
+    """
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.95, ttl_seconds: float = 3600,
+                 max_entries: int = 2000, version_path: Optional[str] = None, name: str = "semantic_cache"):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_path = version_path
+        self.name = name
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), allocated on first store
+        self._created = np.full(max_entries, -np.inf)
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._numbers: List[Optional[tuple]] = [None] * max_entries
+        self._next_slot = 0
+        self._version = self._read_version()
+        self._version_checked_at = time.monotonic()
+
+    @classmethod
+    def from_config(cls, embeddings: Embeddings, name: str = "semantic_cache") -> Optional["SemanticCache"]:
+        """Build the cache from the `semantic_cache` block in config.yaml, or return None if disabled."""
+        config = load_config()
+        settings = config.get("semantic_cache", {})
+        if not settings.get("enabled", False):
+            return None
+        version_path = collection_version_path(config["astra_db"]["collection_name"], settings.get("version_dir", "data"))
+        return cls(embeddings, threshold=settings.get("threshold", 0.95), ttl_seconds=settings.get("ttl_seconds", 3600),
+                   max_entries=settings.get("max_entries", 2000), version_path=version_path, name=name)
+
+    # ---------- Public API ----------
+    def lookup(self, query: str) -> Optional[str]:
+        return self._lookup_vector(query, self.embeddings.embed_query(query))
+
+    async def alookup(self, query: str) -> Optional[str]:
+        return self._lookup_vector(query, await self.embeddings.aembed_query(query))
+
+    def store(self, query: str, answer: str):
+        self._store_vector(query, self.embeddings.embed_query(query), answer)
+
+    async def astore(self, query: str, answer: str):
+        self._store_vector(query, await self.embeddings.aembed_query(query), answer)
+
+    def invalidate(self):
+        with self._lock:
+            self._created[:] = -np.inf
+            self._answers = [None] * self.max_entries
+            self._numbers = [None] * self.max_entries
+        METRICS.incr(f"{self.name}.invalidations")
+        log.info("Semantic cache invalidated", cache=self.name)
+
+    # ---------- Internals ----------
+    def _lookup_vector(self, query: str, vector) -> Optional[str]:
+        self._check_version()
+        q = self._normalize(vector)
+        with self._lock:
+            if self._matrix is None:
+                METRICS.incr(f"{self.name}.misses")
+                return None
+            scores = self._matrix @ q
+            scores[self._created < time.time() - self.ttl_seconds] = -np.inf
+            numbers = self._extract_numbers(query)
+            # Check candidates best-first; only the few above threshold are inspected
+            for slot in np.argsort(-scores)[:8]:
+                if scores[slot] < self.threshold:
+                    break
+                if self._numbers[slot] == numbers:
+                    METRICS.incr(f"{self.name}.hits")
+                    return self._answers[slot]
+        METRICS.incr(f"{self.name}.misses")
+        return None
+
+    def _store_vector(self, query: str, vector, answer: str):
+        q = self._normalize(vector)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, q.shape[0]), dtype=np.float32)
+            slot = self._next_slot
+            self._matrix[slot] = q
+            self._created[slot] = time.time()
+            self._answers[slot] = answer
+            self._numbers[slot] = self._extract_numbers(query)
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def _check_version(self):
+        # Stat the version file at most once a second
+        now = time.monotonic()
+        if now - self._version_checked_at < 1.0:
+            return
+        self._version_checked_at = now
+        version = self._read_version()
+        if version != self._version:
+            self._version = version
+            self.invalidate()
+
+    def _read_version(self) -> Optional[float]:
+        if self.version_path and os.path.exists(self.version_path):
+            return os.path.getmtime(self.version_path)
+        return None
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    @staticmethod
+    def _extract_numbers(query: str) -> tuple:
+        return tuple(sorted(_NUMBER_PATTERN.findall(query.replace(",", ""))))
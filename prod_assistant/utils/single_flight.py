@@ -0,0 +1,50 @@
+# utils/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from prod_assistant.utils.metrics import METRICS
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into one in-flight execution.
+    The first caller (leader) starts the work; callers arriving while it runs await the same result.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Return (result, shared) where shared is True if the result came from another caller's execution.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            METRICS.incr(f"{self.name}.coalesced")
+            self._update_ratio()
+            # shield: one waiter disconnecting must not cancel the shared execution
+            return await asyncio.shield(task), True
+
+        METRICS.incr(f"{self.name}.executions")
+        self._update_ratio()
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return await asyncio.shield(task), False
+
+    def _on_done(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def _update_ratio(self):
+        coalesced = METRICS.counter(f"{self.name}.coalesced")
+        total = coalesced + METRICS.counter(f"{self.name}.executions")
+        METRICS.set_gauge(f"{self.name}.coalescing_ratio", coalesced / total if total else 0.0)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,21 @@
+# utils/text.py
+import re
+from typing import List
+
+# Scraped Flipkart reviews end with "READ MORE <reviewer> Certified Buyer ... Report Abuse"
+REVIEW_BOILERPLATE = re.compile(r"\s*READ MORE\b.*$", re.DOTALL)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "of", "for", "to", "in", "on", "and", "or", "with", "what", "which",
+    "how", "me", "about", "can", "you", "tell", "it", "its", "this", "that", "i", "my", "do", "does", "be",
+})
+# Question and attribute words that never identify a product
+QUERY_STOPWORDS = STOPWORDS | {
+    "much", "price", "prices", "cost", "rating", "ratings", "review", "reviews", "details", "specs", "show", "find",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens, as indexed by BM25 and matched by rerank and compression."""
+    return _TOKEN_PATTERN.findall(str(text).lower())
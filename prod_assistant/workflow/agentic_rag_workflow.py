@@ -13,6 +13,7 @@ from langgraph.cache.memory import InMemoryCache
 from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.context_builder import format_docs
 from prod_assistant.evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
 
 
@@ -39,28 +40,13 @@ class AgenticRAG:
         def retrieve_product_info(query: str) -> str:
             """Retrieve product information including prices, reviews, and details."""
             docs = self.retriever.invoke(query)
-            print(f"Context from Retriever:\n{self._format_docs(docs)}\n")
-            return self._format_docs(docs)
+            context = format_docs(docs)
+            print(f"Context from Retriever:\n{context}\n")
+            return context
         
         return [retrieve_product_info]
 
     
-    # ---------- Helpers ----------
-    def _format_docs(self, docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
-
     # ---------- Nodes ----------
     def _assistant(self, state: AgentState):
         print("--- ASSISTANT ---")
@@ -201,22 +187,8 @@ if __name__ == "__main__":
     retrieved_docs = retriever_obj.invoke(user_query)
     print(retrieved_docs)
 
-    def _format_docs(docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
     
-    retrieved_contexts = [_format_docs(retrieved_docs)]
+    retrieved_contexts = [format_docs(retrieved_docs)]
     print(retrieved_contexts)
     
     context_score = evaluate_context_precision(user_query,response,retrieved_contexts)
@@ -8,6 +8,7 @@ from langgraph.graph.message import add_messages
 from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.context_builder import format_docs
 
 
 class AgenticRAG:
@@ -23,22 +24,6 @@ class AgenticRAG:
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile()
 
-    # ---------- Helpers ----------
-    def _format_docs(self, docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
-
     # ---------- Nodes ----------
     def _ai_assistant(self, state: AgentState):
         print("--- CALL ASSISTANT ---")
@@ -60,7 +45,7 @@ class AgenticRAG:
         query = state["messages"][-1].content
         retriever = self.retriever_obj.load_retriever()
         docs = retriever.invoke(query)
-        context = self._format_docs(docs)
+        context = format_docs(docs)
         return {"messages": [AIMessage(content=context)]}
 
     def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
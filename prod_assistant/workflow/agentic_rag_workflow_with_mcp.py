@@ -1,27 +1,34 @@
 from typing import Annotated, Sequence, TypedDict, Literal
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import CachePolicy
 from langgraph.cache.memory import InMemoryCache
 
 from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.single_flight import SingleFlight
+from prod_assistant.utils.admission import get_limiter
+from prod_assistant.utils.semantic_cache import SemanticCache
+from prod_assistant.workflow.checkpointer import create_checkpointer
 from prod_assistant.evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
 from langchain_mcp_adapters.client import MultiServerMCPClient
 import asyncio
+import re
+import unicodedata
 
 class AgenticRAG:
     """Proper Agentic RAG using LangGraph's ToolNode and tools_condition."""
 
     class AgentState(TypedDict):
         messages: Annotated[Sequence[BaseMessage], add_messages]
+        question: str # Current user question (messages[0] is the first question of the thread)
         revision_count: int # To track number of rewrites
         max_revision_count: int # To limit the number of rewrites
 
@@ -29,7 +36,12 @@ class AgenticRAG:
         self.retriever = Retriever().load_retriever()  # Initialize once
         self.model_loader = ModelLoader()
         self.llm = self.model_loader.load_llm()
-        self.checkpointer = MemorySaver()
+        # Answers for history-free questions can be reused across paraphrases (temperature 0)
+        self.semantic_cache = SemanticCache.from_config(self.model_loader.load_embeddings(), name="agentic_rag_semantic_cache")
+        self.checkpointer = None  # created in async_init (the SQLite backend needs a running loop)
+        self.single_flight = SingleFlight("agentic_rag")
+        self.llm_limiter = get_limiter("llm")
+        self.mcp_limiter = get_limiter("mcp")
         
         # MCP Client Init
         client_config_for_stdio = {
@@ -59,28 +71,25 @@ class AgenticRAG:
     @classmethod
     async def async_init(cls):
         instance = cls()
+        instance.checkpointer = await create_checkpointer()
         instance.mcp_tools = await instance.mcp_client.get_tools()
         instance.llm_with_tools = instance.llm.bind_tools(instance.mcp_tools)
         instance.workflow = instance._build_workflow()
         instance.app = instance.workflow.compile(checkpointer=instance.checkpointer, cache=InMemoryCache())
         return instance
 
+    async def aclose(self):
+        """Release resources held by the checkpointer (e.g. the SQLite connection)."""
+        if hasattr(self.checkpointer, "aclose"):
+            await self.checkpointer.aclose()
+
     
-    # ---------- Helpers ----------
-    def _format_docs(self, docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Normalize a question for coalescing: case, unicode form, whitespace and trailing punctuation."""
+        query = unicodedata.normalize("NFKC", query).lower()
+        query = re.sub(r"\s+", " ", query).strip()
+        return query.rstrip("?!. ")
 
     # ---------- Nodes ----------
     async def _assistant(self, state: AgentState):
@@ -98,28 +107,36 @@ class AgenticRAG:
         ])
         
         chain = prompt | self.llm_with_tools
-        response = await chain.ainvoke({"messages": messages})
+        async with self.llm_limiter:
+            response = await chain.ainvoke({"messages": messages})
         print(f"Assistant Response: {response}")
         return {"messages": [response]}
 
-    async def _generate_response(self, state: AgentState):
+    async def _generate_response(self, state: AgentState, config: RunnableConfig):
         print("--- GENERATE ---")
         messages = state["messages"]
         context = messages[-1].content
             
-        question = messages[0].content
+        question = state.get("question") or messages[0].content
         prompt = ChatPromptTemplate.from_template(
             PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
         )
         
         chain = prompt | self.llm | StrOutputParser()
-        response = await chain.ainvoke({"context": context, "question": question})
+        # Pass config explicitly so LLM tokens reach stream_mode="messages" on Python < 3.11
+        async with self.llm_limiter:
+            response = await chain.ainvoke({"context": context, "question": question}, config)
         print(f"Generated Response: {response}")
         return {"messages": [AIMessage(content=response)]}
 
+    async def _call_tools(self, state: AgentState, config: RunnableConfig):
+        # ToolNode wrapped so MCP calls go through the per-worker MCP admission limiter
+        async with self.mcp_limiter:
+            return await self.tool_node.ainvoke(state, config)
+
     async def _grade_documents(self, state: AgentState) -> Literal["generate", "rewrite"]:
         print("--- GRADER ---")
-        question = state["messages"][0].content
+        question = state.get("question") or state["messages"][0].content
         docs = state["messages"][-1].content
         current_count = state.get("revision_count", 0)
 
@@ -129,7 +146,8 @@ class AgenticRAG:
             input_variables=["question", "docs"],
         )
         chain = prompt | self.llm | StrOutputParser()
-        score = await chain.ainvoke({"question": question, "docs": docs})
+        async with self.llm_limiter:
+            score = await chain.ainvoke({"question": question, "docs": docs})
         
         print(f"Revision count: {current_count}/{state.get('max_revision_count', 2)}")
         
@@ -146,13 +164,14 @@ class AgenticRAG:
     
     async def _rewrite(self, state: AgentState):
         print("--- REWRITE ---")
-        question = state["messages"][0].content
+        question = state.get("question") or state["messages"][0].content
         current_count = state.get("revision_count", 0)
         
-        new_q = await self.llm.ainvoke(
-            [HumanMessage(content=f"Rewrite the query to be clearer. \
-                          Specifically, include that the user is looking for information about product features, price, reviews and ratings: {question}")]
-        )
+        async with self.llm_limiter:
+            new_q = await self.llm.ainvoke(
+                [HumanMessage(content=f"Rewrite the query to be clearer. \
+                              Specifically, include that the user is looking for information about product features, price, reviews and ratings: {question}")]
+            )
         print(f"Rewritten Query: {new_q.content}")
         return {
             "messages": [HumanMessage(content=new_q.content)],
@@ -165,7 +184,8 @@ class AgenticRAG:
         
         # Add nodes
         workflow.add_node("assistant", self._assistant)
-        workflow.add_node("tools", ToolNode(self.mcp_tools), cache_policy=CachePolicy(ttl=120),)
+        self.tool_node = ToolNode(self.mcp_tools)
+        workflow.add_node("tools", self._call_tools, cache_policy=CachePolicy(ttl=120),)
         workflow.add_node("generate", self._generate_response)
         workflow.add_node("rewrite", self._rewrite)
         
@@ -197,7 +217,7 @@ class AgenticRAG:
     # ---------- Public Run ----------
     async def run(self, query: str, thread_id : str = "default_thread") -> str:
         """Run the workflow for a given query."""
-        result = await self.app.ainvoke({"messages": [HumanMessage(content=query)]},
+        result = await self.app.ainvoke({"messages": [HumanMessage(content=query)], "question": query, "revision_count": 0},
                                  config = {"recursion_limit": 10,"configurable": {"thread_id" : thread_id}})  # Pass thread_id for checkpointing
         return result["messages"][-1].content
 
@@ -211,6 +231,82 @@ class AgenticRAG:
         # else
         # return the response
 
+    async def run_coalesced(self, query: str, thread_id : str = "default_thread") -> str:
+        """Run the workflow, sharing one execution among identical concurrent questions.
+
+        Only threads without history are merged with each other, since their answer depends on the
+        question alone; each follower gets the shared question/answer written into its own thread so
+        follow-ups still see it. A thread with history only coalesces with itself (e.g. a double submit).
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        is_fresh_thread = await self._is_fresh_thread(config)
+        if is_fresh_thread and self.semantic_cache is not None:
+            cached = await self.semantic_cache.alookup(query)
+            if cached is not None:
+                await self._record_answer(config, query, cached)
+                return cached
+
+        scope = "__fresh__" if is_fresh_thread else thread_id
+        key = (scope, self._normalize_query(query))
+
+        async def execute():
+            return await self.run(query, thread_id=thread_id), thread_id
+
+        (answer, leader_thread_id), shared = await self.single_flight.do(key, execute)
+        if shared and leader_thread_id != thread_id:
+            await self._record_answer(config, query, answer)
+        elif not shared and is_fresh_thread and self.semantic_cache is not None:
+            await self.semantic_cache.astore(query, answer)
+        return answer
+
+    async def _is_fresh_thread(self, config) -> bool:
+        snapshot = await self.app.aget_state(config)
+        return not snapshot.values.get("messages")
+
+    async def _record_answer(self, config, query: str, answer: str):
+        """Write a question/answer produced elsewhere into this thread, as if generate had just run."""
+        await self.app.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=query), AIMessage(content=answer)], "question": query},
+            as_node="generate",
+        )
+
+    async def astream(self, query: str, thread_id : str = "default_thread"):
+        """Stream node-progress events and answer tokens for a given query.
+
+        Yields dicts of the form {"type": "node", "node": ...} after each node finishes,
+        {"type": "token", "content": ...} for every token produced by the generate node,
+        and a final {"type": "done", "answer": ...} with the complete answer.
+        """
+        config = {"recursion_limit": 10, "configurable": {"thread_id": thread_id}}
+        is_fresh_thread = await self._is_fresh_thread(config)
+        if is_fresh_thread and self.semantic_cache is not None:
+            cached = await self.semantic_cache.alookup(query)
+            if cached is not None:
+                await self._record_answer(config, query, cached)
+                yield {"type": "done", "answer": cached}
+                return
+
+        async for mode, chunk in self.app.astream({"messages": [HumanMessage(content=query)], "question": query, "revision_count": 0},
+                                                  config=config, stream_mode=["updates", "messages"]):
+            if mode == "updates":
+                for node in chunk:
+                    if not node.startswith("__"):  # skip "__metadata__" / "__interrupt__" entries
+                        yield {"type": "node", "node": node}
+            elif mode == "messages":
+                message_chunk, metadata = chunk
+                # Only LLM chunks; the complete AIMessage returned by the node arrives via "done"
+                if (metadata.get("langgraph_node") == "generate" and isinstance(message_chunk, AIMessageChunk)
+                        and message_chunk.content):
+                    yield {"type": "token", "content": message_chunk.content}
+
+        # Direct assistant answers (no tool call) are not token-streamed, so always send the final text
+        state = await self.app.aget_state(config)
+        answer = state.values["messages"][-1].content
+        if is_fresh_thread and self.semantic_cache is not None:
+            await self.semantic_cache.astore(query, answer)
+        yield {"type": "done", "answer": answer}
+
 
 if __name__ == "__main__":
 
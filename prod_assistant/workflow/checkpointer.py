@@ -0,0 +1,282 @@
+import os
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+import aiosqlite
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.metrics import METRICS
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-process checkpointer with per-thread LRU/TTL eviction, a memory cap and bounded checkpoint history.
+
+    InMemorySaver keeps every checkpoint (and every version of the messages channel) for every
+    thread forever; this keeps only the latest `max_checkpoints_per_thread` checkpoints per thread
+    and drops whole threads that are idle for `ttl_seconds` or least recently used beyond the caps.
+    """
+
+    def __init__(self, max_threads: int = 5000, ttl_seconds: float = 3600, max_memory_mb: float = 256,
+                 max_checkpoints_per_thread: int = 20):
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self._lock = threading.RLock()
+        self._last_access = OrderedDict()  # thread_id -> monotonic time, least recently used first
+        self._sizes = defaultdict(int)
+        self._total_bytes = 0
+        self._blob_keys = defaultdict(set)
+        self._write_keys = defaultdict(set)
+
+    # ---------- BaseCheckpointSaver overrides ----------
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if thread_id not in self.storage:  # avoid materialising empty defaultdict entries for unknown threads
+                return None
+            last = self._last_access.get(thread_id)
+            if last is not None and time.monotonic() - last > self.ttl_seconds:
+                self._drop(thread_id, reason="ttl")
+                return None
+            if last is not None:
+                self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            for channel, version in new_versions.items():
+                self._blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+            self._prune_history(thread_id, checkpoint_ns)
+            self._update_size(thread_id)
+            self._touch(thread_id)
+            self._evict(protect=thread_id)
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys[thread_id].add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+            self._update_size(thread_id)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id):
+        # Uses the per-thread key indexes instead of scanning every write and blob
+        with self._lock:
+            self.storage.pop(thread_id, None)
+            for key in self._write_keys.pop(thread_id, ()):
+                self.writes.pop(key, None)
+            for key in self._blob_keys.pop(thread_id, ()):
+                self.blobs.pop(key, None)
+            self._last_access.pop(thread_id, None)
+            self._total_bytes -= self._sizes.pop(thread_id, 0)
+            self._report()
+
+    # ---------- Eviction ----------
+    def _touch(self, thread_id):
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _drop(self, thread_id, reason: str):
+        self.delete_thread(thread_id)
+        METRICS.incr(f"checkpointer.evictions.{reason}")
+
+    def _evict(self, protect: Optional[str] = None):
+        now = time.monotonic()
+        while self._last_access:
+            thread_id, last = next(iter(self._last_access.items()))
+            if thread_id == protect or now - last <= self.ttl_seconds:
+                break
+            self._drop(thread_id, reason="ttl")
+
+        while len(self._last_access) > self.max_threads or self._total_bytes > self.max_bytes:
+            thread_id = next(iter(self._last_access))
+            if thread_id == protect:  # never evict the conversation being written
+                break
+            self._drop(thread_id, reason="lru" if len(self._last_access) > self.max_threads else "memory")
+
+    def _prune_history(self, thread_id, checkpoint_ns):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+        ordered = sorted(checkpoints)  # checkpoint ids are uuid6, so they sort chronologically
+        stale, kept = ordered[:-self.max_checkpoints_per_thread], ordered[-self.max_checkpoints_per_thread:]
+        for checkpoint_id in stale:
+            del checkpoints[checkpoint_id]
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys[thread_id].discard(write_key)
+
+        # Channel versions only grow, so blobs older than the oldest kept checkpoint's versions are unreachable
+        oldest = self.serde.loads_typed(checkpoints[kept[0]][0])
+        live_versions = oldest["channel_versions"]
+        for key in list(self._blob_keys[thread_id]):
+            _, key_ns, channel, version = key
+            if key_ns != checkpoint_ns or channel not in live_versions:
+                continue
+            try:
+                is_stale = version < live_versions[channel]
+            except TypeError:
+                continue
+            if is_stale:
+                self.blobs.pop(key, None)
+                self._blob_keys[thread_id].discard(key)
+
+    def _update_size(self, thread_id):
+        size = 0
+        for checkpoints in self.storage.get(thread_id, {}).values():
+            for checkpoint, metadata, _ in checkpoints.values():
+                size += len(checkpoint[1]) + len(metadata[1])
+        for key in self._blob_keys[thread_id]:
+            if key in self.blobs:
+                size += len(self.blobs[key][1])
+        for key in self._write_keys[thread_id]:
+            for _, _, value, _ in self.writes.get(key, {}).values():
+                size += len(value[1])
+        self._total_bytes += size - self._sizes[thread_id]
+        self._sizes[thread_id] = size
+        self._report()
+
+    def _report(self):
+        METRICS.set_gauge("checkpointer.threads", len(self._last_access))
+        METRICS.set_gauge("checkpointer.bytes", self._total_bytes)
+
+
+class BoundedSqliteSaver(AsyncSqliteSaver):
+    """
+    SQLite-file checkpointer that several worker processes on the same host can share.
+
+    Adds TTL and max-thread eviction (tracked in a `thread_access` table) and keeps only the
+    latest `max_checkpoints_per_thread` checkpoints per thread, since each SQLite checkpoint
+    row stores the full channel values.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, max_threads: int = 5000, ttl_seconds: float = 3600,
+                 max_checkpoints_per_thread: int = 20, sweep_interval_seconds: float = 60):
+        super().__init__(conn)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_sweep = 0.0
+
+    async def setup(self):
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock, self.conn.cursor() as cur:
+            # Other workers write to the same file; wait for their locks instead of failing
+            await cur.execute("PRAGMA busy_timeout = 5000")
+            await cur.execute(
+                "CREATE TABLE IF NOT EXISTS thread_access (thread_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+            )
+            await cur.execute("CREATE INDEX IF NOT EXISTS idx_thread_access_last ON thread_access(last_access)")
+            await self.conn.commit()
+
+    async def aget_tuple(self, config):
+        await self.setup()
+        thread_id = str(config["configurable"]["thread_id"])
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute("SELECT last_access FROM thread_access WHERE thread_id = ?", (thread_id,))
+            row = await cur.fetchone()
+        if row is not None and time.time() - row[0] > self.ttl_seconds:
+            await self.adelete_thread(thread_id)
+            METRICS.incr("checkpointer.evictions.ttl")
+            return None
+        return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        result = await super().aput(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        keep_query = ("SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                      "ORDER BY checkpoint_id DESC LIMIT ?")
+        keep_args = (thread_id, checkpoint_ns, self.max_checkpoints_per_thread)
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute(
+                "INSERT INTO thread_access (thread_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access",
+                (thread_id, time.time()),
+            )
+            await cur.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep_query})",
+                (thread_id, checkpoint_ns, *keep_args),
+            )
+            await cur.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep_query})",
+                (thread_id, checkpoint_ns, *keep_args),
+            )
+            await self.conn.commit()
+
+        if time.monotonic() - self._last_sweep > self.sweep_interval_seconds:
+            self._last_sweep = time.monotonic()
+            await self.aevict()
+        return result
+
+    async def adelete_thread(self, thread_id):
+        await super().adelete_thread(thread_id)
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute("DELETE FROM thread_access WHERE thread_id = ?", (str(thread_id),))
+            await self.conn.commit()
+
+    async def aevict(self):
+        """Delete threads idle longer than the TTL, then the least recently used beyond max_threads."""
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute("SELECT thread_id FROM thread_access WHERE last_access < ?",
+                              (time.time() - self.ttl_seconds,))
+            expired = [row[0] for row in await cur.fetchall()]
+            await cur.execute("SELECT thread_id FROM thread_access ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                              (self.max_threads,))
+            overflow = [row[0] for row in await cur.fetchall() if row[0] not in expired]
+        for thread_id in expired:
+            await self.adelete_thread(thread_id)
+        for thread_id in overflow:
+            await self.adelete_thread(thread_id)
+        METRICS.incr("checkpointer.evictions.ttl", len(expired))
+        METRICS.incr("checkpointer.evictions.lru", len(overflow))
+
+    async def aclose(self):
+        await self.conn.close()
+
+
+async def create_checkpointer(config: Optional[dict] = None):
+    """
+    Build the checkpointer selected by the `checkpointer` block in config.yaml ("memory" or "sqlite").
+    """
+    settings = (config or load_config()).get("checkpointer", {})
+    backend = settings.get("backend", "memory")
+    common = {
+        "max_threads": settings.get("max_threads", 5000),
+        "ttl_seconds": settings.get("ttl_seconds", 3600),
+        "max_checkpoints_per_thread": settings.get("max_checkpoints_per_thread", 20),
+    }
+
+    if backend == "memory":
+        log.info("Using in-memory checkpointer", max_memory_mb=settings.get("max_memory_mb", 256), **common)
+        return BoundedMemorySaver(max_memory_mb=settings.get("max_memory_mb", 256), **common)
+
+    if backend == "sqlite":
+        sqlite_path = settings.get("sqlite_path", os.path.join("data", "checkpoints.sqlite"))
+        if not os.path.isabs(sqlite_path):
+            sqlite_path = os.path.join(os.getcwd(), sqlite_path)
+        os.makedirs(os.path.dirname(sqlite_path), exist_ok=True)
+        log.info("Using SQLite checkpointer", path=sqlite_path, **common)
+        saver = BoundedSqliteSaver(await aiosqlite.connect(sqlite_path), **common)
+        await saver.setup()
+        return saver
+
+    log.error("Unsupported checkpointer backend", backend=backend)
+    raise ValueError(f"Unsupported checkpointer backend: {backend}")
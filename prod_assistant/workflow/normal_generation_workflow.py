@@ -5,28 +5,12 @@ from langchain_core.prompts import ChatPromptTemplate
 from prod_assistant.prompt_library.prompts import PROMPT_REGISTRY, PromptType
 from prod_assistant.retriever.retrieval import Retriever
 from prod_assistant.utils.model_loader import ModelLoader
+from prod_assistant.utils.context_builder import format_docs
+from prod_assistant.utils.semantic_cache import SemanticCache
 
 retriever_obj = Retriever()
 model_loader = ModelLoader()
-
-
-def format_docs(docs) -> str:
-    """Format retrieved documents into a structured text block for the prompt."""
-    if not docs:
-        return "No relevant documents found."
-
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = (
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
-        )
-        formatted_chunks.append(formatted)
-
-    return "\n\n---\n\n".join(formatted_chunks)
+semantic_cache = SemanticCache.from_config(model_loader.load_embeddings(), name="normal_generation_semantic_cache")
 
 
 def build_chain():
@@ -47,7 +31,12 @@ def build_chain():
 
 
 def invoke_chain(query: str, debug: bool = False) -> str:
-    """Run the chain with a user query."""
+    """Run the chain with a user query, reusing cached answers for near-identical queries."""
+    if semantic_cache is not None and not debug:
+        cached = semantic_cache.lookup(query)
+        if cached is not None:
+            return cached
+
     chain = build_chain()
 
     if debug:
@@ -57,7 +46,10 @@ def invoke_chain(query: str, debug: bool = False) -> str:
         print(format_docs(docs))
         print("\n---\n")
 
-    return chain.invoke(query)
+    answer = chain.invoke(query)
+    if semantic_cache is not None:
+        semantic_cache.store(query, answer)
+    return answer
 
 if __name__ == "__main__":
     try:
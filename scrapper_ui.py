@@ -1,6 +1,8 @@
 
 import streamlit as st
 from prod_assistant.etl.data_scrapper import FlipkartScraper
+from prod_assistant.etl.scrape_orchestrator import ParallelScraper
+from prod_assistant.etl.scrape_store import ScrapeStore
 from prod_assistant.etl.data_ingestion import DataIngestion
 import os
 
@@ -35,18 +37,15 @@ if st.button("🚀 Start Scraping"):
     if not product_inputs:
         st.warning("⚠️ Please enter at least one product name or a product description.")
     else:
-        final_data = []
-        for query in product_inputs:
-            st.write(f"🔍 Searching for: {query}")
-            results = flipkart_scraper.scrape_flipkart_products(query, max_products=max_products, review_count=review_count)
-            final_data.extend(results)
-
-        unique_products = {}
-        for row in final_data:
-            if row[1] not in unique_products:
-                unique_products[row[1]] = row
-
-        final_data = list(unique_products.values())
+        st.write(f"🔍 Searching for: {', '.join(product_inputs)}")
+        # Products are deduplicated by product_id; ones scraped within the store TTL are not re-scraped
+        store = ScrapeStore.from_config()
+        try:
+            final_data = ParallelScraper.from_config().scrape(product_inputs, max_products=max_products,
+                                                              review_count=review_count, store=store)
+        finally:
+            if store is not None:
+                store.close()
         st.session_state["scraped_data"] = final_data  # store in session
         flipkart_scraper.save_to_csv(final_data, output_path)
         st.success("✅ Data saved to `data/product_reviews.csv`")
@@ -59,7 +58,9 @@ if "scraped_data" in st.session_state and st.button("🧠 Store in Vector DB (As
             ingestion = ""
             ingestion = DataIngestion()
             st.info("🚀 Running ingestion pipeline...")
-            ingestion.run_pipeline()
+            status = st.empty()
+            ingestion.run_pipeline(progress=lambda inserted, failed, seconds: status.write(
+                f"📥 {inserted} documents stored ({inserted / max(seconds, 1e-9):.0f} docs/sec), {failed} failed"))
             st.success("✅ Data successfully ingested to AstraDB!")
         except Exception as e:
             st.error("❌ Ingestion failed!")
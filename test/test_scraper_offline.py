@@ -0,0 +1,197 @@
+"""
+Offline scraper tests: saved Flipkart pages under test/fixtures/flipkart are served from a local
+HTTP server standing in for flipkart.com.
+
+- search_<query>.html / product_<itm id>.html are the pages as served over plain HTTP.
+- <page>.rendered.html, where present, is the same page after the browser has run its scripts; a
+  stand-in browser serves it, so pages the HTTP path cannot read are checked without Chrome.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+
+from prod_assistant.etl.data_scrapper import POPUP_XPATH, FlipkartScraper
+from prod_assistant.etl.scrape_orchestrator import ParallelScraper
+from prod_assistant.utils.metrics import METRICS
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "flipkart")
+STALL_SECONDS = 30
+
+IPHONE_16_REVIEWS = [
+    "5 Brilliant Camera is excellent and the battery lasts a full day. READ MORE Rohit Sharma Certified Buyer , "
+    "Pune 2 months ago",
+    "4 Really Nice Smooth display, a bit pricey. READ MORE Flipkart Customer Certified Buyer , Chennai 3 months ago",
+]
+IPHONE_15_REVIEWS = [
+    "5 Simply awesome USB-C finally, and the Dynamic Island is handy. READ MORE Karan Mehta Certified Buyer , "
+    "Delhi 1 month ago",
+    "4 Good choice Gets warm while gaming, otherwise great. READ MORE Sneha Patil Certified Buyer , Mumbai 4 months ago",
+]
+GALAXY_S24_REVIEWS = [
+    "5 Mind-blowing purchase Galaxy AI features are useful, compact size. READ MORE Vikram Rao Certified Buyer , "
+    "Hyderabad 6 months ago",
+    "3 Fair Battery could be better. READ MORE Flipkart Customer Certified Buyer , Kolkata 2 months ago",
+]
+IPHONE_16 = ["itm7c0281cd247be", "Apple iPhone 16 (Black, 128 GB)", "4.6", "4,312", "₹69,999"]
+IPHONE_15 = ["itm6ac6485515ae4", "Apple iPhone 15 (Blue, 128 GB)", "4.6", "13,412", "₹59,999"]
+GALAXY_S24 = ["itm4ad0d5a1cc8b8", "SAMSUNG Galaxy S24 5G (Onyx Black, 128 GB)", "4.5", "486", "₹49,999"]
+
+
+def row(listing, reviews):
+    return listing + [" || ".join(reviews)]
+
+
+def fixture_name(url, rendered=False):
+    """Fixture file for a search or product url, or None (404)."""
+    parsed = urlparse(url)
+    if parsed.path == "/search":
+        name = "search_" + parse_qs(parsed.query)["q"][0].replace(" ", "_")
+    elif "/p/" in parsed.path:
+        name = "product_" + parsed.path.rsplit("/", 1)[-1]
+    else:
+        return None
+    if rendered and os.path.exists(os.path.join(FIXTURES, name + ".rendered.html")):
+        return name + ".rendered.html"
+    return name + ".html" if os.path.exists(os.path.join(FIXTURES, name + ".html")) else None
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/search?q=stall"):
+            time.sleep(STALL_SECONDS)  # a page load that hangs
+        name = fixture_name(self.path)
+        if name is None:
+            self.send_error(404)
+            return
+        data = read_fixture(name).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeElement:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def click(self):
+        self.driver.popup_open = False
+        self.driver.popups_closed += 1
+
+
+class FixtureDriver:
+    """The parts of a Selenium driver the scraper uses, over a rendered fixture page."""
+
+    def __init__(self, url):
+        self.current_url = url
+        self.page_source = read_fixture(fixture_name(url, rendered=True))
+        self.popup_open = "✕" in self.page_source
+        self.popups_closed = 0
+
+    def find_elements(self, by, selector):
+        if by == By.XPATH:
+            assert selector == POPUP_XPATH
+            return [_FakeElement(self)] if self.popup_open else []
+        return BeautifulSoup(self.page_source, "lxml").select(selector)
+
+
+class FixtureBrowser:
+    """Stands in for BrowserSession: "renders" a page by loading its .rendered.html fixture."""
+
+    def __init__(self):
+        self.urls = []
+        self.drivers = []
+
+    def run(self, url, kind, action):
+        self.urls.append(url)
+        driver = FixtureDriver(url)
+        self.drivers.append(driver)
+        return action(driver)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    METRICS.drain()
+    yield
+
+
+def page_counters():
+    counters = METRICS.snapshot()["counters"]
+    return {name.split("scraper.")[1]: int(value) for name, value in counters.items() if "_pages." in name}
+
+
+def test_http_pages_with_browser_fallback(base_url, tmp_path):
+    browser = FixtureBrowser()
+    with FlipkartScraper(output_dir=str(tmp_path), base_url=base_url, max_scrolls=0, page_timeout_seconds=1) as scraper:
+        scraper.browser = browser
+        rows = scraper.scrape_flipkart_products("iphone", max_products=3, review_count=2)
+        rows += scraper.scrape_flipkart_products("samsung", max_products=3, review_count=2)
+
+    # The iPhone 17 card has no rating and is skipped; the iPhone 15 page holds one review over HTTP
+    # and the search page for samsung has no product grid, so both are loaded in the browser
+    assert rows == [row(IPHONE_16, IPHONE_16_REVIEWS), row(IPHONE_15, IPHONE_15_REVIEWS),
+                    row(GALAXY_S24, GALAXY_S24_REVIEWS)]
+    assert browser.urls == [
+        f"{base_url}/apple-iphone-15-blue-128-gb/p/itm6ac6485515ae4?pid=MOBH4DQFHDHTZ9GN",
+        f"{base_url}/search?q=samsung",
+    ]
+    # The rendered search page shows the login popup, which is closed before reading
+    assert [driver.popups_closed for driver in browser.drivers] == [0, 1]
+    assert page_counters() == {"search_pages.http": 1, "search_pages.browser_fallback": 1,
+                               "review_pages.http": 2, "review_pages.browser_fallback": 1}
+
+
+def test_missing_pages_fall_back(base_url, tmp_path):
+    browser = FixtureBrowser()
+    with FlipkartScraper(output_dir=str(tmp_path), base_url=base_url, max_scrolls=0, page_timeout_seconds=1) as scraper:
+        scraper.browser = browser
+        reviews = scraper.get_top_reviews(f"{base_url}/unknown-phone/p/itm0000000000000", count=2)
+    assert reviews == "No reviews found"
+    assert page_counters() == {"review_pages.browser_fallback": 1}
+
+
+def test_parallel_scraper_over_http(base_url):
+    rows = ParallelScraper(workers=2, min_interval_seconds=0, base_url=base_url).scrape(
+        ["iphone"], max_products=3, review_count=1)
+
+    assert rows == [row(IPHONE_16, IPHONE_16_REVIEWS[:1]), row(IPHONE_15, IPHONE_15_REVIEWS[:1])]
+    # Counters recorded in the worker processes are merged into this one
+    assert page_counters() == {"search_pages.http": 1, "review_pages.http": 2}
+
+
+def test_parallel_scraper_gives_up_on_stuck_workers(base_url):
+    start = time.perf_counter()
+    rows = ParallelScraper(workers=2, min_interval_seconds=0, base_url=base_url, job_timeout_seconds=3).scrape(
+        ["stall", "iphone"], max_products=3, review_count=1)
+
+    assert time.perf_counter() - start < STALL_SECONDS
+    assert rows == [row(IPHONE_16, IPHONE_16_REVIEWS[:1]), row(IPHONE_15, IPHONE_15_REVIEWS[:1])]
+    counters = METRICS.snapshot()["counters"]
+    assert counters["scraper.timed_out_jobs"] == 1
+    assert counters["scraper.failed_jobs"] == 1